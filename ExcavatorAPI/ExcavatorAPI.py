@@ -9,7 +9,6 @@ from PCA9685_controller import PWMController, ChannelConfig
 from orientation_tracker import OrientationTracker
 from tcp_server import TCPServer
 from pathlib import Path
-import json
 import yaml
 from udp_socket import UDPSocket
 from utils import setup_logging, get_cpu_core_usage, get_cpu_temperature, get_entry_point
@@ -66,6 +65,7 @@ class ExcavatorAPI:
             "get_excavator_config": self.get_excavator_config,
             "get_screen_config": self.get_screen_config,
             "get_pwm_config": self.get_pwm_config,
+            "get_all_configs": self.get_all_configs,
             "status_screen": self.status_screen,
             "status_excavator": self.get_status,
             "status_orientation_tracker": self.status_orientation_tracker,
@@ -244,6 +244,40 @@ class ExcavatorAPI:
             with self.data_lock:
                 self.pwm_controller_config_reserved = False
 
+    def get_all_configs(self, client_tcp_sck=None):
+        fun_name=currentframe().f_code.co_name
+        with self.data_lock:
+            if (self.excavator_config_reserved or self.screen_config_reserved
+                or self.orientation_tracker_config_reserved or self.pwm_controller_config_reserved):
+                if client_tcp_sck:
+                    self.tcp_server.send_error(websocket=client_tcp_sck,error_msg=self.format_error_event_response(message="A configuration is already underway, wait a moment.", context=fun_name))
+                return
+            self.excavator_config_reserved=True
+            self.screen_config_reserved=True
+            self.orientation_tracker_config_reserved=True
+            self.pwm_controller_config_reserved=True
+        try:
+            channel_configs, pump_config = PWMController.load_config()
+            cfg={
+                "excavator": ExcavatorAPI.load_config(),
+                "screen": ScreenManager.load_config(),
+                "orientation_tracker": OrientationTracker.load_config(),
+                "pwm_controller": PWMController.build_channel_config(channel_configs=channel_configs,pump_config=pump_config)
+            }
+            if client_tcp_sck:
+                data=self._format_configuration_response(cfg=cfg,target="all",context="get_config")
+                self.tcp_server.send_response(websocket=client_tcp_sck,data=data)
+        except Exception as e:
+            if client_tcp_sck:
+                self.tcp_server.send_error(websocket=client_tcp_sck,error_msg=self.format_error_event_response(message=self.format_unexpected_err_msg(context=fun_name,e=e), context=fun_name))
+            self.logger.error(f"Error at {fun_name}: {e}")
+        finally:
+            with self.data_lock:
+                self.excavator_config_reserved=False
+                self.screen_config_reserved=False
+                self.orientation_tracker_config_reserved=False
+                self.pwm_controller_config_reserved=False
+
     def configure_orientation_tracker(self, edited_config, client_tcp_sck=None):
         fun_name=currentframe().f_code.co_name
         with self.data_lock:
@@ -1067,7 +1101,8 @@ class ExcavatorAPI:
         "message": "Configuration Succeeded",
         "target": target,
         "context": context,
-        "config": json.dumps(cfg)}
+        # Sent as a nested object, the client parses the whole message once
+        "config": cfg}
 
     def get_status(self, client_tcp_sck=None):
         status={
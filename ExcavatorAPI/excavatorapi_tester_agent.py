@@ -1,34 +1,71 @@
 from tcp_client import TCPClient
 from PCA9685_controller import PumpConfig, ChannelConfig
-from dataclasses import asdict
-import copy
-from time import sleep
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from time import perf_counter
+from collections import namedtuple
+import logging
 
-test_count=0
+logging.basicConfig(level=logging.WARNING)
+log = logging.getLogger("tester")
 
 """
 Agent that tests all excavatorAPI:s public actions 
 """
 
+# Configs fetched once at startup with get_all_configs. Sections only mutate
+# local copies so these stay untouched for the reverts.
+Baselines = namedtuple("Baselines", ["excavator", "screen", "orientation_tracker", "pwm_controller"])
+
+def _wait_any(events, timeout, poll_interval=0.05):
+    """Returns the first of the events that gets set, or None on timeout.
+    Blocks on the first event so it wakes up immediately when that one is set"""
+    deadline = perf_counter() + timeout
+    while True:
+        for event in events:
+            if event.is_set(): return event
+        remaining = deadline - perf_counter()
+        if remaining <= 0: return None
+        events[0].wait(min(remaining, poll_interval))
+
 def wait_for_signal(tester_agent, test_name,timeout=25):
-    global test_count
-    for _ in range(timeout):
-        if tester_agent.test_continuation_signal.is_set():
-            tester_agent.test_continuation_signal.clear()
-            test_count+=1
-            return True
-        sleep(1)
-    tester_agent.test_continuation_signal.clear()
-    raise RuntimeError(f"Test {test_name} timeout while waiting for servers response. {test_count} tests succeeded")
+    signal=tester_agent.test_continuation_signal
+    fired=_wait_any([signal, tester_agent.dead_event], timeout)
+    if fired is signal:
+        signal.clear()
+        tester_agent.completed_tests+=1
+        return True
+    signal.clear()
+    if fired is tester_agent.dead_event:
+        raise RuntimeError(f"Test {test_name} failed, connection to the server was lost. {tester_agent.completed_tests} tests succeeded")
+    raise RuntimeError(f"Test {test_name} timeout while waiting for servers response. {tester_agent.completed_tests} tests succeeded")
+
+def wait_for_state(tester_agent, expected_state, timeout=5):
+    if not tester_agent.wait_state(expected_state, timeout=timeout):
+        raise RuntimeError(f"Timeout while waiting for server state {expected_state}. Current state: {tester_agent.current_state}")
+
+@dataclass
+class TestStep:
+    """One call -> wait -> validate -> check_errors step of the test table"""
+    name: str
+    method: str
+    kwargs: dict = field(default_factory=dict)
+    validate: Optional[Callable] = None
+    delta_errors: int = 0
 
 def validate_config(config_name, new_config, updated_config):
     if new_config is None:
         raise RuntimeError(f"New config is none")
     
-    for property, expected_val in new_config.items():
-        if updated_config[property] != expected_val:
-            print(f"Config {config_name} did not update as expected. Property: {property} - expected_val: {expected_val} - actual val {updated_config[property]}")
-            raise RuntimeError(f"Config {config_name} did not update as expected. Property: {property} - expected_val: {expected_val}")
+    # Whole channel configs match with a single dict comparison. Partial patches and
+    # mismatches fall through to the per-key report below
+    if new_config == updated_config:
+        return
+    
+    # property: (expected_val, actual_val)
+    mismatches = {k: (v, updated_config.get(k)) for k, v in new_config.items() if updated_config.get(k) != v}
+    if mismatches:
+        raise RuntimeError(f"Config {config_name} did not update as expected. Mismatches: {mismatches}")
 
 def check_errors(tester_agent, expected_errors):
     if tester_agent.errors_counter != expected_errors:
@@ -39,7 +76,12 @@ if __name__ == "__main__":
         tester_agent = TCPClient(testing_enabled=True, srv_ip="10.214.33.27")
         expected_errors=0
         if tester_agent.start():
-            print("Tester agent awekens")
+            log.warning("Tester agent awekens")
+            tester_agent.get_all_configs()
+            wait_for_signal(tester_agent=tester_agent, test_name="get_all_configs")
+            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
+            baselines=Baselines(**tester_agent.recent_config)
+
             ######## SCREEN ################
             # tester_agent.stop_screen()
             # result=wait_for_signal(tester_agent=tester_agent, test_name="stop_screen")
@@ -83,7 +125,7 @@ if __name__ == "__main__":
             # result=wait_for_signal(tester_agent=tester_agent, test_name="get_mirroring_status")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
             
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="started_mirroring")
             
             # expected_errors+=1
             # tester_agent.start_mirroring()
@@ -109,7 +151,7 @@ if __name__ == "__main__":
             # tester_agent.start_driving(["lift_boom"])
             # wait_for_signal(tester_agent=tester_agent, test_name="start_driving")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="started_driving")
             
             # expected_errors+=1
             # tester_agent.start_driving(["lift_boom"])
@@ -120,7 +162,7 @@ if __name__ == "__main__":
             # wait_for_signal(tester_agent=tester_agent, test_name="stop_driving")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
             
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="stopped_driving")
 
             # expected_errors+=1
             # tester_agent.start_driving(["heheheheh"])
@@ -135,7 +177,7 @@ if __name__ == "__main__":
             # tester_agent.start_driving(["lift_boom","tilt_boom", "scoop", "rotate"])
             # wait_for_signal(tester_agent=tester_agent, test_name="start_driving")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="started_driving")
             
             # expected_errors+=1
             # tester_agent.start_driving(["pump"])
@@ -163,7 +205,7 @@ if __name__ == "__main__":
             # tester_agent.start_driving_and_mirroring(channel_names=["lift_boom"])
             # wait_for_signal(tester_agent=tester_agent, test_name="start_driving_and_mirroring")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="started_driving_and_mirroring")
             
             # expected_errors+=1
             # tester_agent.start_driving_and_mirroring(channel_names=["lift_boom"])
@@ -188,7 +230,7 @@ if __name__ == "__main__":
             # tester_agent.start_driving_and_mirroring(channel_names=["lift_boom","tilt_boom", "scoop", "rotate"])
             # wait_for_signal(tester_agent=tester_agent, test_name="start_driving_and_mirroring")
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            # sleep(3)
+            # wait_for_state(tester_agent=tester_agent, expected_state="started_driving_and_mirroring")
             
             # expected_errors+=1
             # tester_agent.start_driving_and_mirroring(channel_names=["pump"])
@@ -225,10 +267,7 @@ if __name__ == "__main__":
 
 
             ######### CONFIGURE EXCAVATOR ################
-            # tester_agent.get_excavator_config()
-            # wait_for_signal(tester_agent=tester_agent, test_name="get_excavator_config")
-            # original_cfg=copy.deepcopy(tester_agent.recent_config)
-            # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
+            # original_cfg=baselines.excavator
 
             # new_config={"has_screen": not original_cfg["has_screen"]}
             # tester_agent.configure_excavator(has_screen=new_config["has_screen"])
@@ -257,10 +296,7 @@ if __name__ == "__main__":
 
             
             # ######### CONFIGURE SCREEN ################
-            # tester_agent.get_screen_config()
-            # wait_for_signal(tester_agent=tester_agent, test_name="get_screen_config")
-            # original_cfg=copy.deepcopy(tester_agent.recent_config)
-            # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
+            # original_cfg=baselines.screen
             
             # expected_errors+=1
             # new_config={"render_time": 36,"font_size_body":31,"font_size_header":17}
@@ -269,7 +305,8 @@ if __name__ == "__main__":
             # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
             
             # new_config={"render_time": 3,"font_size_body":5,"font_size_header":17}
-            # print(f"Original config: {original_cfg} - type {type(original_cfg)}")
+            # if log.isEnabledFor(logging.DEBUG):
+            #     log.debug("Original config: %s - type %s", original_cfg, type(original_cfg))
             # new_config["render_time"] = original_cfg["render_time"]+1
             # tester_agent.configure_screen(default_render_time=new_config["render_time"], font_size_header=new_config["font_size_header"], font_size_body=new_config["font_size_body"])
             # wait_for_signal(tester_agent=tester_agent, test_name="configure_screen")
@@ -297,10 +334,7 @@ if __name__ == "__main__":
             
             
             # ######### CONFIGURE ORIENTATION_TRACKER ################
-            # tester_agent.get_orientation_tracker_config()
-            # wait_for_signal(tester_agent=tester_agent, test_name="get_orientation_tracker_config")
-            # original_cfg=copy.deepcopy(tester_agent.recent_config)
-            # check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
+            # original_cfg=baselines.orientation_tracker
             
             # new_config = {"gyro_data_rate": 104, "accel_data_rate": 104, "gyro_range": 250, "accel_range": 4, "enable_lpf2": True, "enable_simple_lpf": True, "alpha": 0.09, "tracking_rate": 100}
             # new_config["tracking_rate"]=original_cfg["tracking_rate"]+1
@@ -341,108 +375,71 @@ if __name__ == "__main__":
             
             
             # ########### CONFIGURE PWM_CONTROLLER ################
-            tester_agent.get_pwm_config()
-            wait_for_signal(tester_agent=tester_agent, test_name="get_pwm_config")
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            
-            original_cfg=copy.deepcopy(tester_agent.recent_config)
+            original_cfg=baselines.pwm_controller
             original_pump=original_cfg["CHANNEL_CONFIGS"]["pump"].copy()
             original_tilt_boom=original_cfg["CHANNEL_CONFIGS"]["tilt_boom"].copy()
             
             chan_cfg=ChannelConfig(output_channel=12,pulse_min=1100,pulse_max=2345,direction=1)
             channel_name="new_channel"
-            new_config=asdict(chan_cfg)
+            new_config={"output_channel":chan_cfg.output_channel,"pulse_min":chan_cfg.pulse_min,"pulse_max":chan_cfg.pulse_max,"direction":chan_cfg.direction}
 
-
-            ### PUMP ALONE
-            new_pump=original_pump.copy()
-            new_pump["pulse_min"] = original_pump["pulse_min"]+1
+            chan=lambda name: tester_agent.recent_config["CHANNEL_CONFIGS"][name]
             
-            tester_agent.configure_pwm_controller(pump=new_pump)
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"]["pump"]
-            validate_config(config_name="pwm_channel", new_config=new_pump, updated_config=updated_cfg)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            
-            ### Set back to original
-            tester_agent.configure_pwm_controller(pump=original_pump)
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"]["pump"]
-            validate_config(config_name="pwm_channel", new_config=original_pump, updated_config=updated_cfg)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            ### --- ###
+            def channel_removed():
+                if tester_agent.recent_config["CHANNEL_CONFIGS"].get(channel_name) is not None:
+                    raise RuntimeError(f"Removing PWM Channel {channel_name} failed")
             
+            # The server merges pump configs per property, so only the changed fields are sent
+            pump_patch={"pulse_min": original_pump["pulse_min"]+1}
+            pump_revert={"pulse_min": original_pump["pulse_min"]}
             
-            ### CHANNEL CONFIG ALONE
             new_tilt_boom=original_tilt_boom.copy()
-            old_dir=original_tilt_boom["direction"]
-            new_dir=0
-            
-            new_dir = -1 if old_dir > 0 else 1
-            new_tilt_boom["direction"]=new_dir
-            channel_configs={"tilt_boom":new_tilt_boom}
-            
-            tester_agent.configure_pwm_controller(channel_configs=channel_configs)
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"]["tilt_boom"]
-            validate_config(config_name="pwm_channel", new_config=new_tilt_boom, updated_config=updated_cfg)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            
-            ### Set back to original
-            sleep(3)
-            tester_agent.configure_pwm_controller(channel_configs={"tilt_boom":original_tilt_boom})
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"]["tilt_boom"]
-            validate_config(config_name="pwm_channel", new_config=original_tilt_boom, updated_config=updated_cfg)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            ### --- ###
-            
-            ### CHANNEL CONFIG AND PUMP UPDATE AT THE SAME TIME
-            new_pump["pulse_max"] = original_pump["pulse_max"]+300
-            new_pump["pulse_min"] = 606
-            channel_configs["tilt_boom"]["deadzone"] = original_tilt_boom["deadzone"] + 0.1
-            
-            
-            tester_agent.configure_pwm_controller(pump=new_pump,channel_configs=channel_configs)
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_tilt_boom=tester_agent.recent_config["CHANNEL_CONFIGS"]["tilt_boom"]
-            updated_pump=tester_agent.recent_config["CHANNEL_CONFIGS"]["pump"]
-            validate_config(config_name="pwm_channel", new_config=new_pump, updated_config=updated_pump)
-            validate_config(config_name="pwm_channel", new_config=channel_configs["tilt_boom"], updated_config=updated_tilt_boom)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-
-            ### Set back to original
-            tester_agent.configure_pwm_controller(pump=original_pump, channel_configs={"tilt_boom":original_tilt_boom})
-            wait_for_signal(tester_agent=tester_agent, test_name="configure_pwm_controller")
-            updated_tilt_boom=tester_agent.recent_config["CHANNEL_CONFIGS"]["tilt_boom"]
-            updated_pump=tester_agent.recent_config["CHANNEL_CONFIGS"]["pump"]
-            validate_config(config_name="pwm_channel", new_config=original_tilt_boom, updated_config=updated_tilt_boom)
-            validate_config(config_name="pwm_channel", new_config=original_pump, updated_config=updated_pump)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            ### --- ###
-
-            ## ADD PWM CHANNEL
-            tester_agent.add_pwm_channel(channel_name=channel_name, channel_type="channel_config",config=new_config)
-            wait_for_signal(tester_agent=tester_agent, test_name="add_pwm_channel")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"][channel_name]
-            validate_config(config_name="pwm_channel", new_config=new_config, updated_config=updated_cfg)
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            ## --- ###
-            
-            ## REMOVE PWM CHANNEL
-            tester_agent.remove_pwm_channel(channel_name=channel_name)
-            wait_for_signal(tester_agent=tester_agent, test_name="remove_pwm_channel")
-            updated_cfg=tester_agent.recent_config["CHANNEL_CONFIGS"].get(channel_name)
-            if updated_cfg is not None:
-                raise RuntimeError(f"Removing PWM Channel {channel_name} failed")
-            check_errors(tester_agent=tester_agent,expected_errors=expected_errors)
-            # --- ###
+            new_tilt_boom["direction"] = -1 if original_tilt_boom["direction"] > 0 else 1
+            
+            both_pump_patch={"pulse_max": original_pump["pulse_max"]+300, "pulse_min": 606}
+            both_pump_revert={"pulse_max": original_pump["pulse_max"], "pulse_min": original_pump["pulse_min"]}
+            both_tilt_boom=new_tilt_boom.copy()
+            both_tilt_boom["deadzone"] = original_tilt_boom["deadzone"] + 0.1
+            
+            TESTS=[
+                ### PUMP ALONE
+                TestStep("pump_pulse_min_bump", "configure_pwm_controller", {"pump": pump_patch},
+                         lambda: validate_config("pwm_channel", pump_patch, chan("pump"))),
+                TestStep("pump_revert", "configure_pwm_controller", {"pump": pump_revert},
+                         lambda: validate_config("pwm_channel", pump_revert, chan("pump"))),
+                
+                ### CHANNEL CONFIG ALONE
+                TestStep("tilt_boom_direction_flip", "configure_pwm_controller", {"channel_configs": {"tilt_boom": new_tilt_boom}},
+                         lambda: validate_config("pwm_channel", new_tilt_boom, chan("tilt_boom"))),
+                TestStep("tilt_boom_revert", "configure_pwm_controller", {"channel_configs": {"tilt_boom": original_tilt_boom}},
+                         lambda: validate_config("pwm_channel", original_tilt_boom, chan("tilt_boom"))),
+                
+                ### CHANNEL CONFIG AND PUMP UPDATE AT THE SAME TIME
+                TestStep("pump_and_tilt_boom", "configure_pwm_controller", {"pump": both_pump_patch, "channel_configs": {"tilt_boom": both_tilt_boom}},
+                         lambda: (validate_config("pwm_channel", both_pump_patch, chan("pump")),
+                                  validate_config("pwm_channel", both_tilt_boom, chan("tilt_boom")))),
+                TestStep("pump_and_tilt_boom_revert", "configure_pwm_controller", {"pump": both_pump_revert, "channel_configs": {"tilt_boom": original_tilt_boom}},
+                         lambda: (validate_config("pwm_channel", original_tilt_boom, chan("tilt_boom")),
+                                  validate_config("pwm_channel", both_pump_revert, chan("pump")))),
+                
+                ## ADD AND REMOVE PWM CHANNEL
+                TestStep("add_pwm_channel", "add_pwm_channel", {"channel_name": channel_name, "channel_type": "channel_config", "config": new_config},
+                         lambda: validate_config("pwm_channel", new_config, chan(channel_name))),
+                TestStep("remove_pwm_channel", "remove_pwm_channel", {"channel_name": channel_name}, channel_removed),
+            ]
+            
+            for t in TESTS:
+                getattr(tester_agent, t.method)(**t.kwargs)
+                wait_for_signal(tester_agent, t.name)
+                expected_errors += t.delta_errors
+                if t.validate: t.validate()
+                check_errors(tester_agent, expected_errors)
             
             tester_agent.shutdown()
             
-            print(f"All of {test_count} tests succeeded!")
+            print(f"All of {tester_agent.completed_tests} tests succeeded!")
     except KeyboardInterrupt:
         pass
     except Exception as e:
-        print(f"Tester agent error: {e}")
+        log.error("Tester agent error: %s", e)
     
\ No newline at end of file
@@ -1,16 +1,96 @@
 import board
 import threading
+import os
+import gc
+from functools import cache
 from adafruit_lsm6ds.lsm6ds3 import LSM6DS3
 from adafruit_lsm6ds import AccelRange, Rate, GyroRange
-from smbus2 import SMBus
-from time import perf_counter, sleep
-from math import degrees
+from smbus2 import SMBus, i2c_msg
+from smbus2.smbus2 import I2C_M_RD
+from ctypes import create_string_buffer
+from time import sleep, monotonic_ns
+from math import degrees, radians, atan2, asin
 import imufusion
 import numpy as np
 from pathlib import Path
 import yaml
 from dataclass_types import ExcavatorAPIProperties
-from utils import setup_logging, get_entry_point
+from utils import setup_logging, get_entry_point, sleep_until_ns
+
+# adafruit_lsm6ds only fills in the enum values once a sensor object has been created,
+# so these are built lazily on first use (after _init_sensor) and then reused
+@cache
+def gyro_ranges():
+    return {
+        250: GyroRange.RANGE_250_DPS,
+        500: GyroRange.RANGE_500_DPS,
+        1000: GyroRange.RANGE_1000_DPS,
+        2000: GyroRange.RANGE_2000_DPS
+    }
+
+@cache
+def accel_ranges():
+    return {
+        2: AccelRange.RANGE_2G,
+        4: AccelRange.RANGE_4G,
+        8: AccelRange.RANGE_8G,
+        16: AccelRange.RANGE_16G
+    }
+
+@cache
+def data_rates():
+    return {
+        104:  Rate.RATE_104_HZ,
+        208:  Rate.RATE_208_HZ,
+        416:  Rate.RATE_416_HZ,
+        833: Rate.RATE_833_HZ,
+        1666: Rate.RATE_1_66K_HZ,
+        3333: Rate.RATE_3_33K_HZ,
+        6666:  Rate.RATE_6_66K_HZ
+    }
+
+def lpf_step(sample, prev, alpha, one_minus_alpha, tmp):
+    """Simple LPF over a whole [gyro, accel] sample in-place: prev = (1-alpha)*prev + alpha*sample.
+    prev holds the filtered output, tmp is scratch space of the same shape"""
+    np.multiply(sample, alpha, out=tmp)
+    np.multiply(prev, one_minus_alpha, out=prev)
+    np.add(prev, tmp, out=prev)
+
+def quat_to_euler(w, x, y, z, out, in_degrees=True):
+    """ZYX euler angles [roll, pitch, yaw] of a unit quaternion written into out[:3].
+    Same formula as Fusion's FusionQuaternionToEuler, without the intermediate array"""
+    half_minus_yy = 0.5 - y*y
+    sin_pitch = -2.0 * (x*z - w*y)
+    if sin_pitch > 1.0: sin_pitch = 1.0
+    elif sin_pitch < -1.0: sin_pitch = -1.0
+    roll = atan2(w*x + y*z, half_minus_yy - x*x)
+    pitch = asin(sin_pitch)
+    yaw = atan2(w*z + x*y, half_minus_yy - z*z)
+    if in_degrees:
+        roll, pitch, yaw = degrees(roll), degrees(pitch), degrees(yaw)
+    out[0] = roll
+    out[1] = pitch
+    out[2] = yaw
+
+# libyaml backed loader/dumper when pyyaml has been built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Indices of the perf state list used by perf_step
+PERF_N, PERF_MEAN, PERF_M2, PERF_MIN, PERF_MAX, PERF_PREV_TS = range(6)
+
+def perf_step(perf, now_ns):
+    """Welford update of the iteration interval (ms) statistics in-place, timestamps in monotonic ns"""
+    interval = (now_ns - perf[PERF_PREV_TS]) * 1e-6
+    n = perf[PERF_N] + 1
+    delta = interval - perf[PERF_MEAN]
+    mean = perf[PERF_MEAN] + delta / n
+    perf[PERF_N] = n
+    perf[PERF_MEAN] = mean
+    perf[PERF_M2] += delta * (interval - mean)
+    if interval < perf[PERF_MIN]: perf[PERF_MIN] = interval
+    if interval > perf[PERF_MAX]: perf[PERF_MAX] = interval
+    perf[PERF_PREV_TS] = now_ns
 
 # NOTE: ExcavatorAPI is responsible for cleaning up with
 # cleanup_callback on unexpected thread crashes
@@ -18,13 +98,35 @@ class OrientationTracker:
     default_address=0x6A
     addresses = [0x6A, 0x6B]
     CTRL8_XL_ADDRESS = 0x17
+    OUTX_L_G_ADDRESS = 0x22 # gyro xyz followed by accel xyz, 12 bytes little endian
+    GYRO_SENSITIVITY = {250: 8.75, 500: 17.5, 1000: 35.0, 2000: 70.0} # mdps/LSB
+    ACCEL_SENSITIVITY = {2: 0.061, 4: 0.122, 8: 0.244, 16: 0.488} # mg/LSB
     default_data_rate = 104
     default_accel_range = 2
     default_gyro_range = 250
+    default_tracking_core = 3
+    default_tracking_priority = 20 # SCHED_FIFO priority 1-99
     accel_formats = ["m/s","g"] # m/s^2/gravity
     gyro_formats = ["r", "dps"] # radians/degreesPerSecond
     orientation_formats=["r","d","q"] # radians/degrees/quaternions
     CONFIG_FILE_NAME = "orientation_tracker_config.yaml"
+    # Seconds the tracking loop waits after a failed sensor read when there is no cleanup_callback
+    SENSOR_ERROR_BACKOFF = 0.1
+    # (mtime_ns, size, parsed_config) of the last load, reparsed only when the file changes
+    _config_cache = None
+    
+    # Every instance attribute, keeps the tracking loop's attribute access off the instance dict
+    __slots__ = (
+        "logger", "config", "running", "cleanup_callback",
+        "address", "orientation_tracking_enabled", "reporting_enabled", "reporting_interval",
+        "accel_format", "gyro_format", "perf_tracking_enabled", "orientation_format", "_emit_orientation",
+        "_stop_event", "orientation_thread", "reporting_thread", "_orientation_bufs", "_orientation_views", "_back_buf", "last_orientation",
+        "_last_update_ns", "_alpha", "_one_minus_alpha", "_lpf_enabled", "_period_ns",
+        "_prev_sample", "_prev_gyro", "_prev_accel", "_lpf_tmp", "_perf", "read_count", "read_miss_target_time_count",
+        "sensor", "bus", "_gyro_unit_factor", "_accel_unit_factor", "_burst_write", "_burst_read",
+        "_raw_buf", "_raw", "_scales", "_sample", "_gyro", "_accel", "_gyro_scale", "_accel_scale",
+        "_gc_disabled",
+    )
     
     def __init__(self, cleanup_callback=None, address=0x6A, orientation_tracking_enabled=True, orientation_format="d", reporting_enabled=False, reporting_interval=1, accel_format="g", gyro_format="dps", perf_tracking_enabled=False):
         self.logger = setup_logging()
@@ -32,11 +134,6 @@ class OrientationTracker:
         self.running = False
         self.cleanup_callback = cleanup_callback
         
-        # Can't be initialied here for some reason
-        self.data_rates = None
-        self.accel_ranges = None
-        self.gyro_ranges = None
-        
         # Parameters
         self.address = address
         self.orientation_tracking_enabled = orientation_tracking_enabled
@@ -47,24 +144,40 @@ class OrientationTracker:
         self.perf_tracking_enabled = perf_tracking_enabled
         self.orientation_format = orientation_format
         self._validate_parameters()
+        # Resolved once so the tracking loop doesn't branch on the format every iteration
+        self._emit_orientation = {
+            "d": self._emit_euler_deg,
+            "r": self._emit_euler_rad,
+            "q": self._emit_quat
+        }[self.orientation_format]
         
         # Threading
         self._stop_event = threading.Event()
         self.orientation_thread = None
         self.reporting_thread = None
-        self.last_orientation = np.zeros(3)
-        self.last_update = 0
-        # For simple lpf
-        self._prev_gyro = np.zeros(3)
-        self._prev_accel = np.zeros(3)
+        # Preallocated loop buffers, the tracking loop only writes into these in-place.
+        # Double buffered: a sample is written element by element into the back buffer and
+        # published by swapping last_orientation, so readers never see a half written sample.
+        # Quaternions need all 4 slots, euler formats use a view over the first 3
+        self._orientation_bufs = (np.zeros(4, dtype=np.float32), np.zeros(4, dtype=np.float32))
+        self._orientation_views = tuple(buf if orientation_format == "q" else buf[:3] for buf in self._orientation_bufs)
+        self._back_buf = 1
+        self.last_orientation = self._orientation_views[0]
+        self._last_update_ns = 0
+        # Values the tracking loop reads every iteration, cached from self.config
+        self._refresh_cached_config()
+        # For simple lpf, also holds the filtered output
+        # gyro and accel are views over one 6 element buffer so the filter runs once per sample
+        self._prev_sample = np.zeros(6, dtype=np.float32)
+        self._prev_gyro = self._prev_sample[:3]
+        self._prev_accel = self._prev_sample[3:]
+        self._lpf_tmp = np.zeros(6, dtype=np.float32)
         
         # Performance tracking 
-        self.perf_n = 0
-        self.perf_mean = 0.0
-        self.perf_m2 = 0.0
-        self.perf_min = float("inf")
-        self.perf_max = float("-inf")
-        self.perf_prev_timestamp = None
+        # [n, mean, m2, min, max, prev_timestamp], see perf_step
+        self._perf = [0, 0.0, 0.0, float("inf"), float("-inf"), None]
+        # True while this tracker has the process wide automatic gc switched off, see start()
+        self._gc_disabled = False
         
         # Stats
         self.read_count = 0
@@ -78,6 +191,13 @@ class OrientationTracker:
             self._start_reporting()
         
         if self.orientation_tracking_enabled:
+            # Generational gc pauses cause missed deadlines in the tracking loop. gc is process wide,
+            # so this turns automatic collection off for every thread until shutdown() turns it back on.
+            # Only done when the reporting thread is there to collect periodically, otherwise cycles would never be freed.
+            # If gc was already off, it's left for whoever turned it off
+            if self.reporting_enabled and gc.isenabled():
+                gc.disable()
+                self._gc_disabled = True
             self._start_orientation_tracking()
         
         self.running = True
@@ -111,32 +231,26 @@ class OrientationTracker:
         self._set_address(address)
         self.sensor = LSM6DS3(i2c, address=self.address)
         
-        # These have to be set after inititalizing the sensor object for some reason
-        self.gyro_ranges ={
-            250: GyroRange.RANGE_250_DPS,
-            500: GyroRange.RANGE_500_DPS,
-            1000: GyroRange.RANGE_1000_DPS,
-            2000: GyroRange.RANGE_2000_DPS
-        }
-        self.accel_ranges ={
-            2: AccelRange.RANGE_2G,
-            4: AccelRange.RANGE_4G,
-            8: AccelRange.RANGE_8G,
-            16: AccelRange.RANGE_16G
-        }
-        self.data_rates={
-            104:  Rate.RATE_104_HZ,
-            208:  Rate.RATE_208_HZ,
-            416:  Rate.RATE_416_HZ,
-            833: Rate.RATE_833_HZ,
-            1666: Rate.RATE_1_66K_HZ,
-            3333: Rate.RATE_3_33K_HZ,
-            6666:  Rate.RATE_6_66K_HZ
-        }
+        # Adafruit reports rad/s and m/s^2, factors to the configured formats for read_gyro/read_accel
+        self._gyro_unit_factor = degrees(1.0) if self.gyro_format == "dps" else 1.0
+        self._accel_unit_factor = 1/9.81 if self.accel_format == "g" else 1.0
         
         # TODO - make the seleciton of the bus through parameter
         self.bus = SMBus(1)
         
+        # Burst read of gyro+accel in one I2C transaction. Messages and buffers are
+        # reused every iteration. The kernel writes straight into _raw_buf and _raw is
+        # an int16 view over it, so decoding needs no copy
+        self._burst_write = i2c_msg.write(self.address, [OrientationTracker.OUTX_L_G_ADDRESS])
+        self._raw_buf = create_string_buffer(12)
+        self._burst_read = i2c_msg(addr=self.address, flags=I2C_M_RD, len=12, buf=self._raw_buf)
+        self._raw = np.frombuffer(self._raw_buf, dtype="<i2", count=6)
+        self._scales = np.ones(6, dtype=np.float32)
+        # float32 end to end, imufusion's C side works on float so nothing gets converted
+        self._sample = np.empty(6, dtype=np.float32)
+        self._gyro = self._sample[:3]
+        self._accel = self._sample[3:]
+        
         # data rates
         self.set_accel_data_rate(self.config["accel_data_rate"])
         self.set_gyro_data_rate(self.config["gyro_data_rate"])
@@ -150,56 +264,77 @@ class OrientationTracker:
             self.bus.write_byte_data(self.address, OrientationTracker.CTRL8_XL_ADDRESS, 128) 
     
     def read_gyro(self): # default - radians/s
-        gyro = np.array(self.sensor.gyro)
-        if self.gyro_format == "dps":
-            gyro = np.degrees(gyro)
+        gyro = np.array(self.sensor.gyro, dtype=np.float32)
+        gyro *= self._gyro_unit_factor
         return gyro
     
     def read_accel(self): # default - m/s^2
-        accel = np.array(self.sensor.acceleration)
-        if self.accel_format == "g":
-            accel = accel / 9.81
+        accel = np.array(self.sensor.acceleration, dtype=np.float32)
+        accel *= self._accel_unit_factor
         return accel
     
+    def read_burst(self):
+        """Reads gyro and accel with a single I2C transaction into the preallocated
+        sample buffer, [gx,gy,gz,ax,ay,az] in the configured formats. The returned
+        array is overwritten on the next call"""
+        self.bus.i2c_rdwr(self._burst_write, self._burst_read)
+        np.multiply(self._raw, self._scales, out=self._sample)
+        return self._sample
+    
+    def _update_scales(self):
+        # raw -> dps/g, then into the configured formats
+        gyro_scale = OrientationTracker.GYRO_SENSITIVITY[self.config["gyro_range"]] / 1000
+        if self.gyro_format == "r":
+            gyro_scale = radians(gyro_scale)
+        accel_scale = OrientationTracker.ACCEL_SENSITIVITY[self.config["accel_range"]] / 1000
+        if self.accel_format == "m/s":
+            accel_scale *= 9.81
+        self._gyro_scale = gyro_scale
+        self._accel_scale = accel_scale
+        self._scales[:3] = gyro_scale
+        self._scales[3:] = accel_scale
+    
     def set_gyro_data_rate(self, rate):
-        if rate in self.data_rates: 
-            self.sensor.gyro_data_rate = self.data_rates[rate]
+        if rate in data_rates(): 
+            self.sensor.gyro_data_rate = data_rates()[rate]
             self.config["gyro_data_rate"] = rate
             self.logger.info(f"Sensors gyro data rate has been set to: {rate} Hz")
         else: #default
             self.logger.warning(f"Invalid gyro data rate using default rate: {OrientationTracker.default_data_rate} Hz")
             self.config["gyro_data_rate"] = OrientationTracker.default_data_rate
-            self.sensor.gyro_data_rate = self.data_rates[OrientationTracker.default_data_rate]
+            self.sensor.gyro_data_rate = data_rates()[OrientationTracker.default_data_rate]
             
     def set_accel_data_rate(self, rate):
-        if rate in self.data_rates: 
-            self.sensor.accelerometer_data_rate = self.data_rates[rate]
+        if rate in data_rates(): 
+            self.sensor.accelerometer_data_rate = data_rates()[rate]
             self.config["accel_data_rate"] = rate
             self.logger.info(f"Sensors acceleration data rate has been set to: {rate} Hz")
         else: #default
             self.logger.warning(f"Invalid accel data rate using default rate: {OrientationTracker.default_data_rate} Hz")
             self.config["accel_data_rate"] = OrientationTracker.default_data_rate
-            self.sensor.accelerometer_data_rate = self.data_rates[OrientationTracker.default_data_rate]
+            self.sensor.accelerometer_data_rate = data_rates()[OrientationTracker.default_data_rate]
             
     def set_gyro_range(self, gyro_range):
-        if gyro_range in self.gyro_ranges: 
-            self.sensor.gyro_range = self.gyro_ranges[gyro_range]
+        if gyro_range in gyro_ranges(): 
+            self.sensor.gyro_range = gyro_ranges()[gyro_range]
             self.config["gyro_range"] = gyro_range
             self.logger.info(f"Sensors gyroscopes dps range has been set to: {gyro_range} DPS")
         else: #default
             self.logger.warning(f"Invalid gyro range using default range: {OrientationTracker.default_gyro_range} DPS")
             self.config["gyro_range"] = OrientationTracker.default_gyro_range
-            self.sensor.gyro_range = self.gyro_ranges[OrientationTracker.default_gyro_range]
+            self.sensor.gyro_range = gyro_ranges()[OrientationTracker.default_gyro_range]
+        self._update_scales()
             
     def set_accel_range(self, accel_range):
-        if accel_range in self.accel_ranges: 
-            self.sensor.accelerometer_range = self.accel_ranges[accel_range]
+        if accel_range in accel_ranges(): 
+            self.sensor.accelerometer_range = accel_ranges()[accel_range]
             self.config["accel_range"] = accel_range
             self.logger.info(f"Sensors accelerometer g range has been set to: {accel_range} G")
         else: #default
             self.logger.warning(f"Invalid accel range using default range: {OrientationTracker.default_accel_range} G")
             self.config["accel_range"] = OrientationTracker.default_accel_range
-            self.sensor.accelerometer_range = self.accel_ranges[OrientationTracker.default_accel_range]
+            self.sensor.accelerometer_range = accel_ranges()[OrientationTracker.default_accel_range]
+        self._update_scales()
     
     def is_lpf2_enabled(self):
         if (self.bus.read_byte_data(self.address, OrientationTracker.CTRL8_XL_ADDRESS) & 0x80) != 0:
@@ -219,25 +354,48 @@ class OrientationTracker:
     def enable_simple_lpf(self):
         if not self.config["enable_simple_lpf"]:
             self.config["enable_simple_lpf"] = True
+            self._refresh_cached_config()
             self.logger.info("Simple lpf has been enabled")
             
     def disable_simple_lpf(self):
         if self.config["enable_simple_lpf"]:
             self.config["enable_simple_lpf"] = False
+            self._refresh_cached_config()
             self.logger.info("Simple lpf has been disabled")
             
     def set_alpha(self, alpha):
         if not (0 < alpha < 1):
             raise ValueError("Alpha must be between 0-1")
         self.config["alpha"] = alpha
+        self._refresh_cached_config()
         self.logger.info(f"Simple LPF's alpha has been set to: {alpha}")
     
+    def _refresh_cached_config(self):
+        self._alpha = self.config["alpha"]
+        self._one_minus_alpha = 1 - self._alpha
+        self._lpf_enabled = self.config["enable_simple_lpf"]
+        # Integer ns, the loop only ever adds this to its deadline
+        self._period_ns = 1_000_000_000 // self.config["tracking_rate"]
+    
     def set_tracking_rate(self, rate):
         if not (ExcavatorAPIProperties.TRACKING_RATE_MIN <= rate <= ExcavatorAPIProperties.TRACKING_RATE_MAX):
             raise RuntimeError("Orientation tracking rate must be between 0-300")
         self.config["tracking_rate"] = rate
+        self._refresh_cached_config()
         self.logger.info(f"Orientation tracking rate has been set to: {rate} hz")
     
+    def _emit_euler_deg(self, quaternion, out):
+        quat_to_euler(quaternion.w, quaternion.x, quaternion.y, quaternion.z, out)
+    
+    def _emit_euler_rad(self, quaternion, out):
+        quat_to_euler(quaternion.w, quaternion.x, quaternion.y, quaternion.z, out, in_degrees=False)
+    
+    def _emit_quat(self, quaternion, out):
+        out[0] = quaternion.w
+        out[1] = quaternion.x
+        out[2] = quaternion.y
+        out[3] = quaternion.z
+    
     def _start_reporting(self):
         self.reporting_thread = threading.Thread(
             target=self._reporting_loop,
@@ -247,9 +405,18 @@ class OrientationTracker:
 
     def _reporting_loop(self):
         self.logger.info("Starting status reporting loop")
+        # Keep the reporting thread off the tracking core
+        other_cores = set(range(os.cpu_count() or 1)) - {self._tracking_core()}
+        if other_cores:
+            try:
+                os.sched_setaffinity(0, other_cores)
+            except OSError as e:
+                self.logger.warning(f"Could not set reporting thread affinity: {e}")
         try:
             while not self._stop_event.is_set():
                 self.report_status()
+                # Automatic gc is disabled while tracking, collect here off the tracking thread
+                gc.collect()
                 sleep(self.reporting_interval)
         except Exception as e:
             self.logger.error(f"Reporting loop thread crashed: {e}")
@@ -261,45 +428,64 @@ class OrientationTracker:
         )
         self.orientation_thread.start()
 
+    def _tracking_core(self):
+        """Configured tracking core, or the last core on boards that have fewer cores"""
+        return min(self.config["tracking_core"], (os.cpu_count() or 1) - 1)
+
+    def _elevate_priority(self):
+        """Pins the calling thread to the tracking core and switches it to SCHED_FIFO.
+        Needs root, without it the loop just keeps running with the default scheduling"""
+        core = self._tracking_core()
+        if core != self.config["tracking_core"]:
+            self.logger.warning(f"tracking_core {self.config['tracking_core']} doesn't exist on this board, using core {core}")
+        priority = self.config["tracking_priority"]
+        try:
+            os.sched_setaffinity(0, {core})
+            self.logger.info(f"Orientation tracking thread pinned to core {core}")
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not pin orientation tracking thread to core {core}: {e}")
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            self.logger.info(f"Orientation tracking thread running with SCHED_FIFO priority {priority}")
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not set SCHED_FIFO priority {priority} for orientation tracking thread: {e}")
+    
     def _orientation_tracking_loop(self):
         self.logger.info("Orientation tracking loop has started")
+        self._elevate_priority()
         # Warn if formats don't match imufusion's requirements
         if self.gyro_format != "dps":
             self.logger.warning(f"imufusion requires gyro in degrees/s, but gyro_format is '{self.gyro_format}'. Results may be incorrect.")
         if self.accel_format != "g":
             self.logger.warning(f"imufusion requires accel in g, but accel_format is '{self.accel_format}'. Results may be incorrect.")
-        self.last_update = perf_counter()
-        self.perf_prev_timestamp = perf_counter()
         ahrs = imufusion.Ahrs()
-        now = perf_counter()
+        # Absolute schedule, each deadline is the previous one + period so sleep jitter doesn't accumulate
+        next_deadline = monotonic_ns()
+        self._last_update_ns = next_deadline
+        self._perf[PERF_PREV_TS] = next_deadline
         
         while not self._stop_event.is_set():
-            try: # Iteration duration calculated each time because it allows client to change it later
-                iteration_duration=1/self.config["tracking_rate"]
-                desired_next = perf_counter() + iteration_duration
+            try: # Cached config values are refreshed whenever the client changes them
+                sample = self.read_burst()
+                gyro = self._gyro
+                accel = self._accel
                 
-                gyro = self.read_gyro()
-                accel = self.read_accel()
+                if self._lpf_enabled: # Apply simple lpf
+                    lpf_step(sample, self._prev_sample, self._alpha, self._one_minus_alpha, self._lpf_tmp)
+                    gyro = self._prev_gyro
+                    accel = self._prev_accel
                 
-                if self.config["enable_simple_lpf"]: # Apply simple lpf
-                    gyro = (1-self.config["alpha"])*self._prev_gyro+(self.config["alpha"]*gyro)
-                    accel = (1-self.config["alpha"])*self._prev_accel+(self.config["alpha"]*accel)
-                    self._prev_accel=accel
-                    self._prev_gyro=gyro
-                
-                dt = perf_counter() - self.last_update
+                # One timestamp per iteration for dt and perf tracking, integer ns until the final delta
+                now = monotonic_ns()
+                dt = (now - self._last_update_ns) * 1e-9
+                self._last_update_ns = now
                 
                 ahrs.update_no_magnetometer(gyro, accel, dt)
-                self.last_update = perf_counter()
                 
-                if self.orientation_format == "d":
-                    self.last_orientation = ahrs.quaternion.to_euler()
-                elif self.orientation_format == "q":
-                    self.last_orientation = np.array([ahrs.quaternion.w, ahrs.quaternion.x, ahrs.quaternion.y, ahrs.quaternion.z])
-                elif self.orientation_format == "r":
-                    self.last_orientation = np.radians(ahrs.quaternion.to_euler())
-                else:
-                    raise Exception("invalid orientation format")
+                back = self._back_buf
+                self._emit_orientation(ahrs.quaternion, self._orientation_bufs[back])
+                self.last_orientation = self._orientation_views[back]
+                self._back_buf = back ^ 1
                 
                 self.read_count += 1
                 
@@ -309,25 +495,26 @@ class OrientationTracker:
                     self.read_miss_target_time_count = 0
                 
                 if self.perf_tracking_enabled:
-                    now = perf_counter()
-                    interval = (now - self.perf_prev_timestamp) * 1000
-                    self.perf_n += 1
-                    delta = interval - self.perf_mean
-                    self.perf_mean += delta / self.perf_n
-                    self.perf_m2 += delta * (interval - self.perf_mean)
-                    self.perf_max = max(interval, self.perf_max)
-                    self.perf_min = min(interval, self.perf_min)
-                    self.perf_prev_timestamp = now
+                    perf_step(self._perf, now)
                 
-                sleep_time = desired_next - perf_counter()
-                if sleep_time > 0:
-                    sleep(sleep_time)
-                else:
+                next_deadline += self._period_ns
+                current = monotonic_ns()
+                if current > next_deadline:
+                    # Missed the deadline, restart the schedule from now instead of trying to catch up
                     self.read_miss_target_time_count += 1
+                    next_deadline = current
+                else:
+                    sleep_until_ns(next_deadline)
             except Exception as e:
                 self.logger.error(f"Sensor read error: {e}")
                 if self.cleanup_callback:
+                    # The owner tears the tracker down, stop touching the bus at real-time priority meanwhile
                     self.cleanup_callback()
+                    break
+                # Nobody to tear the tracker down, back off so a persistent bus error can't starve the pinned core
+                if self._stop_event.wait(OrientationTracker.SENSOR_ERROR_BACKOFF):
+                    break
+                next_deadline = monotonic_ns()
                 
         self.logger.info("Orientation tracking loop exited")
  
@@ -346,23 +533,26 @@ class OrientationTracker:
         }
  
     def get_orientation(self):
-        return self.last_orientation
+        # Copy, the published buffer becomes the back buffer again two samples later
+        return self.last_orientation.copy()
  
     def report_status(self):
         missing_target_time = (self.read_miss_target_time_count/self.read_count) if self.read_count != 0 else 0
-        self.logger.info(f"Current orientation: x: {self.last_orientation[0]:.2f}° y: {self.last_orientation[1]:.2f}° z: {self.last_orientation[2]:.2f}°")
+        orientation = self.get_orientation()
+        self.logger.info(f"Current orientation: x: {orientation[0]:.2f}° y: {orientation[1]:.2f}° z: {orientation[2]:.2f}°")
         self.logger.info(f"Read count: {self.read_count}")
         self.logger.info(f"Read target miss count: {self.read_miss_target_time_count}")
         self.logger.info(f"Missing target time: {missing_target_time*100:.2f}%")
         
         if self.perf_tracking_enabled:
-            if self.perf_n > 1: 
-                variance = self.perf_m2 / (self.perf_n - 1) 
+            n, mean, m2, perf_min, perf_max, _ = self._perf
+            if n > 1: 
+                variance = m2 / (n - 1) 
                 std_dev = variance ** 0.5
                 self.logger.info(f"Reading delay std dev: {std_dev} ms")
-                self.logger.info(f"Reading delay min: {self.perf_min} ms")
-                self.logger.info(f"Reading delay max: {self.perf_max} ms")
-                self.logger.info(f"Reading delay mean: {self.perf_mean} ms")
+                self.logger.info(f"Reading delay min: {perf_min} ms")
+                self.logger.info(f"Reading delay max: {perf_max} ms")
+                self.logger.info(f"Reading delay mean: {mean} ms")
     
     def shutdown(self):
         self._stop_event.set()
@@ -376,6 +566,9 @@ class OrientationTracker:
             if self.reporting_thread != calling_thread:
                 self.reporting_thread.join(timeout=1.0)
         self.logger.info("OrientationTrackers status reporting thread shutdown")
+        if self._gc_disabled:
+            gc.enable()
+            self._gc_disabled = False
         self.running = False
         self.logger.info("OrientationTracker service has been shutdown")
         return True
@@ -389,6 +582,7 @@ class OrientationTracker:
 
     def reload_config(self):
         self.config = OrientationTracker.load_config(logger=self.logger)
+        self._refresh_cached_config()
         self.logger.info("OrientationTracker config has been reloaded")
         self.update_state()
 
@@ -397,11 +591,18 @@ class OrientationTracker:
         config_path = get_entry_point() / "config" / OrientationTracker.CONFIG_FILE_NAME
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file '{OrientationTracker.CONFIG_FILE_NAME}' not found")
+        stat = config_path.stat()
+        cache = OrientationTracker._config_cache
+        if cache is not None and cache[0] == stat.st_mtime_ns and cache[1] == stat.st_size:
+            # Callers mutate their config, hand out a copy
+            return dict(cache[2])
+        
         with open(config_path, 'r') as f:
-            raw_config = yaml.safe_load(f)
+            raw_config = yaml.load(f, Loader=YamlLoader)
     
         parsed_config = OrientationTracker._parse_config(raw_config)
         OrientationTracker.validate_config(parsed_config)
+        OrientationTracker._config_cache = (stat.st_mtime_ns, stat.st_size, dict(parsed_config))
         if logger:
             logger.info(f"OrientationTrackers config has been validated and loaded: {parsed_config}")
         return parsed_config
@@ -416,7 +617,9 @@ class OrientationTracker:
             "tracking_rate": int(cfg['tracking_rate']),
             "enable_simple_lpf": cfg['enable_simple_lpf'],
             "enable_lpf2": cfg['enable_lpf2'],
-            "alpha": float(cfg['alpha'])
+            "alpha": float(cfg['alpha']),
+            "tracking_core": int(cfg.get('tracking_core', OrientationTracker.default_tracking_core)),
+            "tracking_priority": int(cfg.get('tracking_priority', OrientationTracker.default_tracking_priority))
         }
         return config
 
@@ -442,6 +645,11 @@ class OrientationTracker:
             errors.append(f"validate_config: enable_simple_lpf must be a boolean")
         if not isinstance(parsed_config["enable_lpf2"], bool):
             errors.append(f"validate_config: enable_lpf2 must be a boolean")
+        # The upper bound depends on the board, _tracking_core() clamps it when pinning
+        if parsed_config["tracking_core"] < 0:
+            errors.append(f"validate_config: tracking_core must be 0 or greater")
+        if not (1 <= parsed_config["tracking_priority"] <= 99):
+            errors.append(f"validate_config: tracking_priority must be between 1-99")
 
         if errors:
             raise ValueError("Configuration validation failed:\n" + "\n".join(errors))
@@ -453,7 +661,9 @@ class OrientationTracker:
             raise FileNotFoundError(f"Configuration file '{OrientationTracker.CONFIG_FILE_NAME}' not found")
         
         with open(config_path, 'w') as f:
-            yaml.safe_dump(config, f,default_flow_style=False)
+            yaml.dump(config, f, Dumper=YamlDumper, default_flow_style=False)
+        # mtime resolution can hide a quick rewrite, so don't rely on it here
+        OrientationTracker._config_cache = None
             
 # example usage     
 # if __name__ == "__main__":
@@ -3,28 +3,59 @@ import websockets
 import json
 from tcp_client import TCPClient
 import json
-import queue
 import threading
+import weakref
+from collections import deque
+from itertools import count
+
+# Actions without parameters. Their messages are matched as raw text so the
+# common case skips json parsing, both JSON.stringify and json.dumps spacing.
+PARAMETERLESS_ACTIONS = ("get_screen_config", "get_pwm_config", "get_orientation_tracker_config")
+STATIC_ACTION_MESSAGES = {}
+for _action in PARAMETERLESS_ACTIONS:
+    STATIC_ACTION_MESSAGES[json.dumps({"action": _action})] = _action
+    STATIC_ACTION_MESSAGES[json.dumps({"action": _action}, separators=(",", ":"))] = _action
 
 class ProxyServer:
+    MESSAGES_RING_SIZE = 2**8
+    # Payloads that never change, serialized once
+    EVT_STARTED_EXCAVATOR_CLIENT = json.dumps({"event": "started_excavator_client", "message": ""})
+    ERR_CLIENT_NOT_INITIALIZED = json.dumps({"event": "error", "message": "ExcavatorClient needs to be initialized first."})
+    ERR_NOT_JSON = json.dumps({"event": "error", "message": "Message has to be in json format"})
+    ERR_NO_ACTION = json.dumps({"event": "error", "message": "No action given."})
+    
     def __init__(self):
         self.ws_server=None
-        self.wsclients=set()
+        # Weak so a connection that never reaches the finally block can't leak
+        self.wsclients=weakref.WeakSet()
         self.stop_event=threading.Event()
         # Simple way to assume who to send a possible error message for.
         self.prev_command_client=None
         
         self.excavator_client=None
-        self.messages_queue=asyncio.Queue()
+        self.loop=None
+        # Ring of messages from the TCPClient thread (single producer, single consumer).
+        # Bounded so a stalled consumer drops the oldest messages, seq shows the gaps
+        self.messages=deque(maxlen=ProxyServer.MESSAGES_RING_SIZE)
+        self.messages_event=asyncio.Event()
+        self.messages_seq=count()
     
     
     async def start(self):
+        self.loop=asyncio.get_running_loop()
         self.ws_server=await websockets.serve(self.handle_client,"localhost", 5433)
     
+    def enqueue_message(self, msg):
+        """Called from the TCPClient thread. asyncio primitives are not thread safe,
+        so the consumer is woken up through the event loop"""
+        msg["seq"]=next(self.messages_seq)
+        self.messages.append(msg)
+        self.loop.call_soon_threadsafe(self.messages_event.set)
+    
     async def start_excavator_client(self, ip):
         if self.excavator_client is not None: return True
         
-        self.excavator_client=TCPClient(srv_ip=ip, message_queue=self.messages_queue)
+        self.excavator_client=TCPClient(srv_ip=ip, message_callback=self.enqueue_message)
         result = self.excavator_client.start()
         if result is False:
             await ProxyServer.send_error(self.prev_command_client, f"Could not find excavator with ip: {ip}. Make sure you are in the same network")
@@ -33,6 +64,8 @@ class ProxyServer:
     
     async def shutdown(self):
         self.stop_event.set()
+        # Wake up send_queued_messages if it's waiting for messages
+        self.messages_event.set()
         if self.excavator_client: 
             self.excavator_client.shutdown()
         await self.close_clients()
@@ -41,9 +74,15 @@ class ProxyServer:
     
     async def close_clients(self):
         if self.wsclients:
-            for cl in list(self.wsclients):
+            clients=list(self.wsclients)
+            for cl in clients:
                 print(f"Closing connection for client: {cl.remote_address}")
-                await cl.close()
+            await asyncio.gather(*[cl.close() for cl in clients], return_exceptions=True)
+    
+    async def broadcast(self, payload):
+        """Sends an already serialized payload to every connected client concurrently"""
+        if self.wsclients:
+            await asyncio.gather(*[cl.send(payload) for cl in list(self.wsclients)], return_exceptions=True)
     
     async def handle_client(self, websocket):
         """Handle a connected client"""
@@ -64,12 +103,12 @@ class ProxyServer:
                     excavator_ip=parameters.get("ip")
                     result = await self.start_excavator_client(ip=excavator_ip)
                     if result is False: continue
-                    await ProxyServer.send_event(client=websocket,event="started_excavator_client")                    
+                    await websocket.send(ProxyServer.EVT_STARTED_EXCAVATOR_CLIENT)
                     continue
                     
                 # No other action is allowed if excavatorclient is not available
                 if self.excavator_client is None:
-                    await ProxyServer.send_error(websocket,"ExcavatorClient needs to be initialized first.")
+                    await websocket.send(ProxyServer.ERR_CLIENT_NOT_INITIALIZED)
                     continue
                 
                 if action=="get_screen_config":
@@ -86,26 +125,35 @@ class ProxyServer:
         except Exception as e:
             print(f"Error with {client_addr}: {e}")
         finally:
-            self.wsclients.remove(websocket)
+            self.wsclients.discard(websocket)
 
     async def _parse_message(self, msg, client):
+        action = STATIC_ACTION_MESSAGES.get(msg)
+        if action is not None:
+            return {"action": action}, action
         try:
             parameters=json.loads(msg)
         except Exception:
-            await ProxyServer.send_error(client,"Message has to be in json format")
+            await client.send(ProxyServer.ERR_NOT_JSON)
             return None, None
         
         action = parameters.get("action")
         if action is None:
-            await ProxyServer.send_error(client,"No action given.")
+            await client.send(ProxyServer.ERR_NO_ACTION)
             return None, None
         
         return parameters, action
     
     async def send_queued_messages(self):
         while not self.stop_event.is_set():
-            if not self.messages_queue.empty():
-                msg=await self.messages_queue.get()
+            try:
+                await asyncio.wait_for(self.messages_event.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            # Clear before draining so an append during the drain is not missed
+            self.messages_event.clear()
+            while self.messages:
+                msg=self.messages.popleft()
                 event=msg.get("event")
                 if event == "error":
                     err_msg=msg.get("message")
@@ -114,7 +162,6 @@ class ProxyServer:
                     await ProxyServer.send_message(self.prev_command_client,msg=msg)
                 else:
                     print(f"Unknown event: {event}")
-            await asyncio.sleep(1)
      
     @staticmethod
     async def send_error(client,msg):
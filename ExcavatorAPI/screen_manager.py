@@ -1,15 +1,21 @@
-import subprocess
 import os
+import socket
+import fcntl
+import struct
+import array
+from bisect import bisect_left
 import board
 import digitalio
 import threading
 import adafruit_ssd1306 as SSD1306
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from smbus2 import SMBus, i2c_msg
 from time import sleep, time
-from dataclasses import dataclass
-from dataclass_types import ExcavatorAPIProperties
-from math import ceil
 from collections import deque
+from dataclasses import dataclass, field
+from dataclass_types import ExcavatorAPIProperties
+from functools import lru_cache, partial
 import yaml
 from pathlib import Path
 from utils import setup_logging, get_cpu_temperature, get_entry_point
@@ -21,83 +27,124 @@ class RenderViewInfo:
     render_time: float
     header: str = ""
     body: str = ""
+    # Body split into display rows, filled in by ScreenManager.add_to_renderq
+    wrapped_lines: list = field(default_factory=list, repr=False)
 
 # ============================================================================
 # Helper Functions - Network Utilities
 # Credit: https://github.com/AI-MaSi/Excavator
 # ============================================================================
 
+# Network info is read from /proc and ioctls, forking shells
+# every second was most of the default views cost
+SIOCGIFADDR = 0x8915
+SIOCGIWESSID = 0x8B1B
+SIOCGIWSTATS = 0x8B0F
+IW_ESSID_MAX_SIZE = 32
+IW_STATS_SIZE = 32 # sizeof(struct iw_statistics) rounded up
+IW_QUAL_DBM = 0x08 # level and noise are dBm, otherwise relative to the drivers max_qual
+IW_QUAL_LEVEL_INVALID = 0x20
+# libyaml backed loader/dumper when pyyaml has been built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+NETINFO_REFRESH_INTERVAL = 30 # seconds, IP and SSID of an unchanged interface
+RSSI_REFRESH_INTERVAL = 2 # seconds, also how often the interface is checked
+
 def get_active_interface():
+    """Interface of the default route from /proc/net/route"""
     try:
-        cmd = "ip route get 1.1.1.1 | awk '{print $5}' | head -n 1"
-        interface = subprocess.check_output(cmd, shell=True).decode("utf-8").strip()
-        return interface
-    except subprocess.CalledProcessError:
+        with open("/proc/net/route") as f:
+            next(f) # header
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[1] == "00000000":
+                    return fields[0]
+        return None
+    except OSError:
         return None
 
 def get_ip_address(interface):
     try:
-        cmd = f"ip addr show {interface} | grep 'inet ' | awk '{{print $2}}' | cut -d'/' -f1"
-        IP = subprocess.check_output(cmd, shell=True).decode("utf-8").strip()
-        return IP
-    except subprocess.CalledProcessError:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            ifreq = struct.pack("256s", interface.encode("utf-8")[:15])
+            return socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFADDR, ifreq)[20:24])
+    except OSError:
         return "No IP Found"
 
-def get_ssid(interface):
+def _iw_point_ioctl(interface, request, length, flags=0):
+    """Wireless extensions ioctl that returns its data through an iw_point pointer.
+    Returns the filled buffer or None if the interface doesn't support it"""
+    buf = array.array("B", bytes(length))
+    addr, _ = buf.buffer_info()
+    # struct iwreq: ifr_name[16] + union iwreq_data (16 bytes), iw_point = {pointer, length, flags}
+    iwreq = bytearray(struct.pack("16sPHH", interface.encode("utf-8")[:15], addr, length, flags).ljust(32, b"\0"))
     try:
-        cmd = f"iwgetid -r {interface}"
-        SSID = subprocess.check_output(cmd, shell=True).decode("utf-8").strip()
-        return SSID
-    except subprocess.CalledProcessError:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            fcntl.ioctl(s.fileno(), request, iwreq)
+    except OSError:
+        return None
+    return buf
+
+def get_ssid(interface):
+    essid = _iw_point_ioctl(interface, SIOCGIWESSID, IW_ESSID_MAX_SIZE + 1)
+    if essid is None:
         return "Not Connected"
+    SSID = essid.tobytes().split(b"\0", 1)[0].decode("utf-8", errors="replace")
+    return SSID if SSID else "Not Connected"
 
 def get_rssi(interface):
-    try:
-        # First try to get Signal level in standard format
-        cmd = f"iwconfig {interface} | grep 'Signal level' | awk '{{print $4}}' | cut -d'=' -f2"
-        rssi = subprocess.check_output(cmd, shell=True).decode("utf-8").strip()
-
-        # Check if the format is XX/100
-        if '/' in rssi:
-            numerator, denominator = rssi.split('/')
-            # Convert percentage to approximate dBm value
-            # Typically, 100% ≈ -50 dBm, 0% ≈ -100 dBm
-            percentage = float(numerator)
-            fine_tune = 20 # to make the bars make more sense
-            rssi_dbm = -100 + (percentage / 100.0) * 50 + fine_tune
-            print(f"after: {rssi_dbm}")
-            return int(rssi_dbm)
-
-        # If it's already in dBm format, just return the integer
-        return int(rssi)
-    except (subprocess.CalledProcessError, ValueError):
+    """Signal level in dBm from the wireless stats"""
+    # flags=1 clears the drivers updated flag like iwconfig does
+    stats = _iw_point_ioctl(interface, SIOCGIWSTATS, IW_STATS_SIZE, flags=1)
+    if stats is None:
         return None
+    # struct iw_statistics: u16 status, iw_quality {u8 qual, u8 level, u8 noise, u8 updated}
+    level, updated = stats[3], stats[5]
+    if updated & IW_QUAL_LEVEL_INVALID:
+        return None
+    # Relative levels can't be turned into dBm without the drivers range info
+    if not updated & IW_QUAL_DBM:
+        return None
+    # level is a signed 8 bit dBm value
+    return level - 256 if level >= 128 else level
+
+# Only used for measuring text, never drawn on the display
+_measure_draw = ImageDraw.Draw(Image.new("1", (1, 1)))
+
+def wrap_text(text, text_len, max_width):
+    """Greedy word wrap on rendered pixel widths, the fonts are proportional.
+    text_len(s) returns the width of s in pixels"""
+    lines = []
+    line = ""
+    for word in text.split(" "):
+        candidate = f"{line} {word}" if line else word
+        if not line or text_len(candidate) <= max_width:
+            line = candidate
+        else:
+            lines.append(line)
+            line = word
+    lines.append(line)
+    return lines
 
-def draw_wifi_signal(draw, rssi, x, y):
-    if rssi is None:
-        return
-
-    # Adjust thresholds for percentage-based values converted to dBm
-    bars = 0
-    if rssi > -65:  # About 70% signal strength
-        bars = 3
-    elif rssi > -75:  # About 50% signal strength
-        bars = 2
-    elif rssi > -85:  # About 30% signal strength
-        bars = 1
-
-    bar_width = 5
-    bar_height = 3
-    spacing = 2
-
-    for i in range(bars):
-        draw.rectangle(
-            (x, y - i * (bar_height + spacing),
-             x + bar_width, y - i * (bar_height + spacing) + bar_height),
-            outline=255,
-            fill=255
-        )
+# dBm limits for 1, 2 and 3 bars (~30%, ~50%, ~70% signal), a bar needs rssi above its limit
+_RSSI_BUCKETS = (-85, -75, -65)
+
+def rssi_to_bars(rssi):
+    if not rssi:
+        return 0
+    return bisect_left(_RSSI_BUCKETS, rssi)
 
+def wifi_signal_rects(x, y, bar_width=5, bar_height=3, spacing=2):
+    """Rectangles of the bars stacked upwards from (x, y), bar i drawn for i < bars"""
+    return tuple(
+        (x, y - i * (bar_height + spacing), x + bar_width, y - i * (bar_height + spacing) + bar_height)
+        for i in range(len(_RSSI_BUCKETS))
+    )
+
+def draw_wifi_signal(draw, rects, bars):
+    for rect in rects[:bars]:
+        draw.rectangle(rect, outline=255, fill=255)
 
 
 # 128x64 self.oled display
@@ -105,7 +152,15 @@ def draw_wifi_signal(draw, rssi, x, y):
 # without wrapping, which is roughly 60 characters
 class ScreenManager: 
     FONT_PATH = get_entry_point() / 'Montserrat-VariableFont_wght.ttf'
+    I2C_ADDRESS = 0x3D
+    # SSD1306 control bytes and commands used for partial page updates
+    CONTROL_CMD = 0x00
+    CONTROL_DATA = 0x40
+    SET_COL_ADDR = 0x21
+    SET_PAGE_ADDR = 0x22
     CONFIG_FILE_NAME = "screen_config.yaml"
+    # (mtime_ns, size, parsed_config) of the last load, reparsed only when the file changes
+    _config_cache = None
     RENDERQ_BUFFER_SIZE = 100
     def __init__(self, cleanup_callback=None,width=128, height=64, padding=2):
         self.logger = setup_logging()
@@ -116,13 +171,25 @@ class ScreenManager:
         self.padding=padding
         self.width = width
         self.height=height
+        # Frame buffer reused by every render, only touched from the render thread
+        self._fb = Image.new("1", (width, height))
+        self._draw = ImageDraw.Draw(self._fb)
+        self._wifi_rects = wifi_signal_rects(width - 10, 10)
         self.running=False
         self.cleanup_callback = cleanup_callback
         
         # default view 
         self.default_TIME_DELAY = 4  # switch between screens every 4 seconds
-        self.previous_network_name, self.previous_IP, self.previous_rssi, self.previous_toggle_display = None, None, None, None
+        # Key of the default view currently on the display, None forces a redraw
+        self._last_default_key = None
+        # Rasterized default views by key, the bars bucket keeps rssi jitter from missing the cache
+        self._default_view_buf = lru_cache(maxsize=16)(self._rasterize_default_view)
+        # Text widths by (text, "header"/"body"), the same strings are measured over and over
+        self._text_len = lru_cache(maxsize=512)(self._measure_text)
         self.toggle_display = False
+        # IP and SSID are only looked up again when the interface changes or they get old,
+        # the interface and rssi are refreshed every RSSI_REFRESH_INTERVAL
+        self._iface_cache = {"iface": None, "ip": None, "ssid": None, "stamp": 0, "rssi": None, "rssi_stamp": None}
         self.last_toggle_time = time()
         self.font_body = ImageFont.truetype(ScreenManager.FONT_PATH, self.config["font_size_body"])
         self.font_header = ImageFont.truetype(ScreenManager.FONT_PATH, self.config["font_size_header"])
@@ -131,8 +198,16 @@ class ScreenManager:
         
         # RenderQueue - rolling window -> removes oldest when overflowing
         self.render_que_thread = None
+        # add_to_renderq runs on the server's thread pool, one thread per client, so producers take the lock too
         self.render_queue = deque(maxlen=ScreenManager.RENDERQ_BUFFER_SIZE)
         self.que_lock = threading.Lock()
+        # Set by add_to_renderq, wakes the render loop out of the default view
+        self._queue_has_data = threading.Event()
+        
+        # What the display currently shows in SSD1306 page layout (pages x columns),
+        # None forces the next flush to send every page
+        self._prev_buf = None
+        self.bus = None
         
     
     def start(self):
@@ -154,16 +229,72 @@ class ScreenManager:
             self.logger.warning("SSD1306Manger.start() first")
             return False
         
-        self.oled.fill(0)
-        self.oled.show()
+        # One command burst + one data burst for the whole blank frame
+        blank = np.zeros((self.height // 8, self.width), dtype=np.uint8)
+        self.bus.i2c_rdwr(*self._page_msgs(0, self.height // 8 - 1, 0, self.width - 1, blank.tobytes()))
+        self._prev_buf = blank
         return True
+    
+    def _page_msgs(self, first_page, last_page, lo, hi, data):
+        """Address window command burst followed by the data burst, each with a single control byte"""
+        cmd = i2c_msg.write(ScreenManager.I2C_ADDRESS, [ScreenManager.CONTROL_CMD, ScreenManager.SET_COL_ADDR, lo, hi, ScreenManager.SET_PAGE_ADDR, first_page, last_page])
+        data = i2c_msg.write(ScreenManager.I2C_ADDRESS, bytes([ScreenManager.CONTROL_DATA]) + data)
+        return cmd, data
+    
+    def _pack(self, image):
+        # Page p byte at column c holds rows 8p..8p+7 of that column, LSB on top
+        return np.packbits(np.asarray(image, dtype=np.uint8), axis=0, bitorder="little")
+    
+    def _flush(self, image):
+        self._flush_buf(self._pack(image))
+    
+    def _flush_buf(self, buf):
+        """Sends only the pages and column ranges of buf that differ from the previous frame"""
+        prev = self._prev_buf
+        if prev is None:
+            prev = ~buf # everything differs
+        changed = buf != prev
+        msgs = []
+        for page in np.flatnonzero(changed.any(axis=1)):
+            cols = np.flatnonzero(changed[page])
+            lo, hi = int(cols[0]), int(cols[-1])
+            msgs.extend(self._page_msgs(int(page), int(page), lo, hi, buf[page, lo:hi+1].tobytes()))
+        if msgs:
+            # Every changed page goes out in one I2C_RDWR call
+            self.bus.i2c_rdwr(*msgs)
+        self._prev_buf = buf
 
     def get_status(self):
         return {
             "running": self.running,
-            "render_queue_count": len(self.render_queue)
+            "render_queue_count": self._renderq_len()
         }
 
+    def _renderq_len(self):
+        with self.que_lock:
+            return len(self.render_queue)
+
+    def _peek_renderq(self):
+        """Snapshot of the newest queued item or None, one lock round per render"""
+        with self.que_lock:
+            return self.render_queue[-1] if self.render_queue else None
+
+    def _rendered(self, item):
+        """Counts one render of item and removes it once its render_count runs out"""
+        with self.que_lock:
+            item.render_count -= 1
+            if item.render_count > 0:
+                return
+            # Identity, not ==, equal messages are separate queue entries
+            if self.render_queue and self.render_queue[-1] is item:
+                self.render_queue.pop()
+                return
+            # A newer message was queued during the render, item is further down now
+            for i, queued in enumerate(self.render_queue):
+                if queued is item:
+                    del self.render_queue[i]
+                    return
+
     def add_to_renderq(self, item: RenderViewInfo):
         if not self.running:
             self.logger.warning("SSD1306Manger.start() first")
@@ -178,14 +309,20 @@ class ScreenManager:
         # Text Wrapping has to be done manually so lets remove all special chars
         item.header = item.header.replace('\t', '').replace('\n', '').strip().replace('  ', ' ')[:32]
         item.body = item.body.replace('\t', '').replace('\n', '').strip().replace('  ', ' ')[:100]
+        # Wrapped once here instead of on every rendered frame
+        item.wrapped_lines = wrap_text(item.body, partial(self._text_len, font_id="body"), self.oled.width-(self.padding*2))
         
         with self.que_lock:
             self.render_queue.append(item)
+        self._queue_has_data.set()
         self.logger.info(f"Item: {item} has been added to the screens render queue")
 
     def _init_ssd1306(self):
         i2c = board.I2C()
-        self.oled = SSD1306.SSD1306_I2C(self.width, self.height, i2c, addr=0x3D, reset=None)
+        self.oled = SSD1306.SSD1306_I2C(self.width, self.height, i2c, addr=ScreenManager.I2C_ADDRESS, reset=None)
+        # Adafruit is only used for the init sequence, frames are flushed page by page through smbus2
+        self.bus = SMBus(1)
+        self._prev_buf = None
         self.logger.info("SSD1306 has been setup")
 
     def _validate_renderview_parameter(self, item: RenderViewInfo):
@@ -198,25 +335,32 @@ class ScreenManager:
         
         return errors
 
-    def _update_default_view(self, interface, network_name, IP, rssi=None, show_cpu_temp=False):
-        image = Image.new("1", (self.oled.width, self.oled.height))
-        draw = ImageDraw.Draw(image)
+    def _clear_fb(self):
+        self._draw.rectangle((0, 0, self.width, self.height), fill=0)
+        return self._draw
+
+    def _measure_text(self, text, font_id):
+        font = self.font_header if font_id == "header" else self.font_body
+        return _measure_draw.textlength(text, font=font)
 
-        if show_cpu_temp:
-            cpu_temp = get_cpu_temperature()
-            if cpu_temp is not None:
-                cpu_temp_str = f"CPU: {cpu_temp:.0f}C"
-                cpu_temp_width = draw.textlength(cpu_temp_str, font=self.font_body)
+    def _rasterize_default_view(self, is_wlan, network_name, IP, bars, cpu_temp):
+        """Renders the default view into a packed page buffer, cpu_temp None shows the network label"""
+        draw = self._clear_fb()
+
+        if cpu_temp is not None:
+            if cpu_temp != "":
+                cpu_temp_str = f"CPU: {cpu_temp}C"
+                cpu_temp_width = self._text_len(cpu_temp_str, "body")
                 cpu_temp_x = (self.oled.width - cpu_temp_width) // 2
                 draw.text((cpu_temp_x, 0), cpu_temp_str, font=self.font_body, fill=255)
         else:
-            network_label = "SSID:" if "wlan" in interface else "Network:"
-            network_label_width = draw.textlength(network_label, font=self.font_body)
+            network_label = "SSID:" if is_wlan else "Network:"
+            network_label_width = self._text_len(network_label, "body")
             network_label_x = (self.oled.width - network_label_width) // 2
             draw.text((network_label_x, 0), network_label, font=self.font_body, fill=255)
 
-        network_name_width = draw.textlength(network_name, font=self.font_body)
-        IP_width = draw.textlength(IP, font=self.font_header)
+        network_name_width = self._text_len(network_name, "body")
+        IP_width = self._text_len(IP, "header")
 
         network_name_x = (self.oled.width - network_name_width) // 2
         IP_x = (self.oled.width - IP_width) // 2
@@ -225,11 +369,12 @@ class ScreenManager:
         draw.text((IP_x, 32), IP, font=self.font_header, fill=255)
         draw.line((0, 14, self.oled.width, 14), fill=255)
 
-        if rssi:
-            draw_wifi_signal(draw, rssi, self.oled.width - 10, 10)
+        if bars:
+            draw_wifi_signal(draw, self._wifi_rects, bars)
 
-        self.oled.image(image)
-        self.oled.show()
+        buf = self._pack(self._fb)
+        buf.flags.writeable = False # shared through the cache
+        return buf
     
     def set_default_render_time(self, duration): # TODO - muuta fontit käyttämään configia...
         if (not isinstance(duration, float) and not isinstance(duration, int)) or duration <= 0:
@@ -243,6 +388,9 @@ class ScreenManager:
             return
         self.config["font_size_header"] = size
         self.font_header = ImageFont.truetype(ScreenManager.FONT_PATH, self.config['font_size_header'])
+        self._default_view_buf.cache_clear()
+        self._text_len.cache_clear()
+        self._last_default_key = None
         self.logger.info(f"font_size_header has been set to {self.config['font_size_header']}")
 
     def set_font_body(self, size):
@@ -251,6 +399,9 @@ class ScreenManager:
             return
         self.config["font_size_body"] = size
         self.font_body = ImageFont.truetype(ScreenManager.FONT_PATH, self.config['font_size_body'])
+        self._default_view_buf.cache_clear()
+        self._text_len.cache_clear()
+        self._last_default_key = None
         self.logger.info(f"font_size_body has been set to {self.config['font_size_body']}")
     
     def _render_default_view(self):
@@ -262,55 +413,55 @@ class ScreenManager:
                 self.toggle_display = not self.toggle_display
                 self.last_toggle_time = current_time
 
-            interface = get_active_interface()
-            IP = get_ip_address(interface) if interface else "NONE"
-            network_name = get_ssid(interface) if "wlan" in interface else "Wired" if interface else ""
-            rssi = get_rssi(interface) if "wlan" in interface else None
-
-            if network_name != self.previous_network_name or IP != self.previous_IP or (
-                    rssi and self.previous_rssi != rssi) or self.toggle_display != self.previous_toggle_display:
-                self._update_default_view(interface, network_name, IP, rssi, show_cpu_temp=self.toggle_display)
-                self.previous_network_name, self.previous_IP, self.previous_rssi, self.previous_toggle_display = network_name, IP, rssi, self.toggle_display
-
-            sleep(1)
-
-    def _render_message_view(self, header="no header", body="no message"):
-        image = Image.new("1", (self.oled.width, self.oled.height))
-        draw = ImageDraw.Draw(image)
+            interface, IP, network_name, rssi = self._get_netinfo(current_time)
+            cpu_temp = None
+            if self.toggle_display:
+                temp = get_cpu_temperature()
+                cpu_temp = f"{temp:.0f}" if temp is not None else ""
+            key = (interface is not None and "wlan" in interface, network_name, IP, rssi_to_bars(rssi), cpu_temp)
+
+            # Steady state skips both the rasterizing and the I2C
+            if key != self._last_default_key:
+                self._flush_buf(self._default_view_buf(*key))
+                self._last_default_key = key
+
+            # A queued message (or shutdown) cuts the default view short
+            if self._queue_has_data.wait(timeout=1):
+                return
+
+    def _get_netinfo(self, now):
+        cache = self._iface_cache
+        if cache["rssi_stamp"] is not None and now - cache["rssi_stamp"] < RSSI_REFRESH_INTERVAL:
+            return cache["iface"], cache["ip"], cache["ssid"], cache["rssi"]
+        cache["rssi_stamp"] = now
         
-        header_width = draw.textlength(header, font=self.font_header)
+        interface = get_active_interface()
+        is_wlan = interface is not None and "wlan" in interface
+        if cache["ip"] is None or interface != cache["iface"] or now - cache["stamp"] > NETINFO_REFRESH_INTERVAL:
+            cache["iface"] = interface
+            cache["ip"] = get_ip_address(interface) if interface else "NONE"
+            cache["ssid"] = get_ssid(interface) if is_wlan else "Wired" if interface else ""
+            cache["stamp"] = now
+        cache["rssi"] = get_rssi(interface) if is_wlan else None
+        return interface, cache["ip"], cache["ssid"], cache["rssi"]
+
+    def _render_message_view(self, header="no header", lines=("no message",)):
+        self._last_default_key = None
+        draw = self._clear_fb()
+        
+        header_width = self._text_len(header, "header")
         header_x = (self.oled.width - header_width) // 2
         
         draw.text((header_x, 0), header, font=self.font_header, fill=255)
         line_y = self.config["font_size_header"]+1
         draw.line((0, line_y, self.oled.width, line_y), fill=255)
         
-        body_width = draw.textlength(body, font=self.font_body)
-        max_text_width = self.oled.width-(self.padding*2)
-        
-        # Handle possible wrapping 
         # TODO - maybe rolling text if > 3 lines
-        if body_width >= max_text_width:
-            body_row_count = ceil(body_width / max_text_width)
-            row_letter_count = int(len(body) / body_row_count)
-            rows = []
-            start_index = 0
-            end_index = row_letter_count
-            
-            for i in range(body_row_count):
-                rows.append(body[start_index:end_index])
-                start_index+=row_letter_count
-                end_index=start_index+row_letter_count
-                
-            for i, row in enumerate(rows):
-                body_x = (self.padding)
-                draw.text((body_x, (line_y+1)+i*12), row, font=self.font_body, fill=255)
-        else: # Text fits on a single row
-            body_x = (self.padding)
-            draw.text((body_x, line_y+1), body, font=self.font_body, fill=255)
+        body_x = (self.padding)
+        for i, row in enumerate(lines):
+            draw.text((body_x, (line_y+1)+i*12), row, font=self.font_body, fill=255)
         
-        self.oled.image(image)
-        self.oled.show()
+        self._flush(self._fb)
 
     def _start_render_que(self):
         if self.render_que_thread and self.render_que_thread.is_alive():
@@ -327,24 +478,17 @@ class ScreenManager:
         self.logger.info("Starting render queue")
         while not self.stop_event.is_set():
             try:
-                # When render_queue is empty display the default view
-                with self.que_lock:
-                    renderq_len=len(self.render_queue)
-                if renderq_len == 0:
+                # When render_queue is empty display the default view.
+                # Cleared before peeking so an item added after the peek still sets it
+                self._queue_has_data.clear()
+                next_view = self._peek_renderq()
+                if next_view is None:
                     self._render_default_view()
-                else: 
-                    with self.que_lock:
-                        next_view_index = renderq_len-1
-                        next_view = self.render_queue[next_view_index]
-                
-                    if next_view.view == "message":
-                        self._render_message_view(header=next_view.header, body=next_view.body)
-                        sleep(next_view.render_time)
-                        # Update render count and remove it if 0
-                        with self.que_lock:
-                            self.render_queue[next_view_index].render_count = next_view.render_count - 1
-                            if self.render_queue[next_view_index].render_count == 0:
-                                self.render_queue.pop()
+                elif next_view.view == "message":
+                    self._render_message_view(header=next_view.header, lines=next_view.wrapped_lines)
+                    sleep(next_view.render_time)
+                    # Update render count and remove it if 0
+                    self._rendered(next_view)
             except Exception as e:
                 self.logger.error(f"Error occured in _render_que_loop: {e}")
                 if self.cleanup_callback:
@@ -357,12 +501,16 @@ class ScreenManager:
             return True
             
         self.stop_event.set()
+        self._queue_has_data.set()
         calling_thread=threading.current_thread()
         if self.render_que_thread and self.render_que_thread.is_alive():
             if calling_thread != self.render_que_thread:
                 self.render_que_thread.join(timeout=10)
          
         self.clear_display()
+        if self.bus:
+            self.bus.close()
+            self.bus = None
         self.stop_event.clear()
         self.running=False
         self.logger.info("ScreenManager service has been shutdown")
@@ -384,11 +532,18 @@ class ScreenManager:
 
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file '{ScreenManager.CONFIG_FILE_NAME}' not found")
+        stat = config_path.stat()
+        cache = ScreenManager._config_cache
+        if cache is not None and cache[0] == stat.st_mtime_ns and cache[1] == stat.st_size:
+            # Callers mutate their config, hand out a copy
+            return dict(cache[2])
+        
         with open(config_path, 'r') as f:
-            raw_config = yaml.safe_load(f)
+            raw_config = yaml.load(f, Loader=YamlLoader)
     
         parsed_config = ScreenManager._parse_config(raw_config)
         ScreenManager.validate_config(parsed_config)
+        ScreenManager._config_cache = (stat.st_mtime_ns, stat.st_size, dict(parsed_config))
         if logger:
             logger.info(f"ScreenManagers config has been validated and loaded: {parsed_config}")
         return parsed_config
@@ -423,7 +578,9 @@ class ScreenManager:
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file '{ScreenManager.CONFIG_FILE_NAME}' not found")
         with open(config_path, 'w') as f:
-            yaml.safe_dump(config, f,default_flow_style=False)
+            yaml.dump(config, f, Dumper=YamlDumper, default_flow_style=False)
+        # mtime resolution can hide a quick rewrite, so don't rely on it here
+        ScreenManager._config_cache = None
     
 # Example
 # if __name__ == "__main__":
@@ -1,5 +1,7 @@
 import time
+import math
 import board
+import numpy as np
 from adafruit_lsm6ds.lsm6ds3 import LSM6DS3
 from adafruit_lsm6ds import AccelRange, Rate, GyroRange
 from smbus2 import SMBus
@@ -7,8 +9,10 @@ from smbus2 import SMBus
 bus = SMBus(1)  # I2C bus 1
 addr = 0x6A
 
-accel_prev_values = None
-gyro_prev_values = None
+# Filter states, indexed by the sensor argument of apply_lpf (0 gyro, 1 accel)
+accel_prev_values = np.zeros(3, dtype=np.float64)
+gyro_prev_values = np.zeros(3, dtype=np.float64)
+lpf_initialised = [False, False]
 lpf_enabled = False
 N = 1000
 
@@ -17,7 +21,21 @@ sensor = LSM6DS3(i2c)
 alpha = 0.1
 # print(dir(sensor))
 
-SAMPLE_RATE = 100
+# LSM6DS3 FIFO registers
+FIFO_CTRL3 = 0x08 # DEC_FIFO_GYRO[5:3], DEC_FIFO_XL[2:0]
+FIFO_CTRL5 = 0x0A # ODR_FIFO[6:3], FIFO_MODE[2:0]
+FIFO_STATUS1 = 0x3A # DIFF_FIFO[7:0], unread 16-bit words
+FIFO_DATA_OUT_L = 0x3E
+FIFO_MODE_BYPASS = 0b000
+FIFO_MODE_CONTINUOUS = 0b110
+FIFO_DIFF_MASK = 0x0FFF
+# Largest block read that is a whole number of x,y,z samples
+FIFO_READ_BYTES = 30
+FIFO_POLL_INTERVAL = 0.005
+
+# Sensitivities in the order of accel_ranges / gyro_ranges
+accel_sensitivities = [0.061, 0.122, 0.244, 0.488] # mg/LSB
+gyro_sensitivities = [8.75, 17.5, 35.0, 70.0] # mdps/LSB
 
 sample_ratemap= {
     0: "1.6 HZ",
@@ -55,94 +73,92 @@ def init_lsm6ds(i2c):
     return LSM6DS3(i2c)
 
 def apply_lpf(values, sensor=1):
-    global accel_prev_values
-    global gyro_prev_values
-    if sensor: # accel
-        
-        if not accel_prev_values:
-            accel_prev_values = values
-            return accel_prev_values
-        
-        accel_prev_values[0] = (1-alpha) * accel_prev_values[0] + values[0] * alpha
-        accel_prev_values[1] = (1-alpha) * accel_prev_values[1] + values[1] * alpha
-        accel_prev_values[2] = (1-alpha) * accel_prev_values[2] + values[2] * alpha
-        return accel_prev_values.copy()
+    """Updates the filter state in place from values and returns the state.
+    The state is shared between calls, callers copy it into their own row"""
+    prev = accel_prev_values if sensor else gyro_prev_values
+    if not lpf_initialised[sensor]:
+        prev[:] = values
+        lpf_initialised[sensor] = True
+        return prev
     
-    else: #gyro
-        if not gyro_prev_values:
-            gyro_prev_values = values
-            return gyro_prev_values
-        
-        gyro_prev_values[0] = (1-alpha) * gyro_prev_values[0] + values[0] * alpha
-        gyro_prev_values[1] = (1-alpha) * gyro_prev_values[1] + values[1] * alpha
-        gyro_prev_values[2] = (1-alpha) * gyro_prev_values[2] + values[2] * alpha
-        return gyro_prev_values.copy()
+    # (1-alpha) * prev + alpha * values without temporaries
+    prev -= values
+    prev *= (1-alpha)
+    prev += values
+    return prev
+    
+
+def fifo_odr(rate):
+    # ODR_FIFO codes follow the sensor ODR codes, 1.6 Hz is not supported by the FIFO
+    return 1 if rate == Rate.RATE_1_6_HZ else rate
+
+def start_fifo(rate, gyro=False):
+    """Restarts the FIFO in continuous mode with only the accelerometer or the gyro in it"""
+    bus.write_byte_data(addr, FIFO_CTRL5, FIFO_MODE_BYPASS) # flushes old data
+    bus.write_byte_data(addr, FIFO_CTRL3, (1 << 3) if gyro else 1) # decimation 1, other sensor left out
+    bus.write_byte_data(addr, FIFO_CTRL5, (fifo_odr(rate) << 3) | FIFO_MODE_CONTINUOUS)
+
+def stop_fifo():
+    bus.write_byte_data(addr, FIFO_CTRL5, FIFO_MODE_BYPASS)
+
+def read_fifo_samples(n, scale):
+    """Collects n x,y,z samples from the FIFO, the sensor ODR sets the cadence"""
+    raw = bytearray(n * 6)
+    filled = 0
+    while filled < len(raw):
+        status = bus.read_i2c_block_data(addr, FIFO_STATUS1, 2)
+        available = (((status[1] << 8) | status[0]) & FIFO_DIFF_MASK) * 2
+        available -= available % 6
+        if not available:
+            time.sleep(FIFO_POLL_INTERVAL)
+            continue
+        
+        end = min(filled + available, len(raw))
+        while filled < end:
+            chunk = min(FIFO_READ_BYTES, end - filled)
+            raw[filled:filled+chunk] = bus.read_i2c_block_data(addr, FIFO_DATA_OUT_L, chunk)
+            filled += chunk
     
+    return np.frombuffer(raw, dtype="<i2").reshape(-1, 3) * scale
 
 def take_samples(n, sensor):
-    results = []
-    iteration_duration=1/SAMPLE_RATE
+    scale = accel_scale(sensor)
+    start_fifo(sensor.accelerometer_data_rate)
+    try:
+        results = read_fifo_samples(n, scale)
+    finally:
+        stop_fifo()
     
-    for _ in range(n):
-        desired_next = time.perf_counter() + iteration_duration
-        
-        accel_x, accel_y, accel_z = sensor.acceleration
-        result = [accel_x, accel_y, accel_z]
-        if lpf_enabled:
-            result = apply_lpf(list((accel_x, accel_y, accel_z)), sensor=1)
-        
-        results.append(result)
-        
-        sleep_time = desired_next - time.perf_counter()
-        if sleep_time > 0:
-            time.sleep(sleep_time)
-        
+    if lpf_enabled:
+        for row in results:
+            row[:] = apply_lpf(row, sensor=1)
     return results
 
+def accel_scale(sensor):
+    return accel_sensitivities[accel_ranges.index(sensor.accelerometer_range)] / 1000 * 9.80665
+
+def gyro_scale(sensor):
+    return math.radians(gyro_sensitivities[gyro_ranges.index(sensor.gyro_range)] / 1000)
+
 def take_gyro_samples(n, sensor):
-    results = []
-    iteration_duration=1/SAMPLE_RATE
+    scale = gyro_scale(sensor)
+    start_fifo(sensor.gyro_data_rate, gyro=True)
+    try:
+        results = read_fifo_samples(n, scale)
+    finally:
+        stop_fifo()
     
-    for _ in range(n):
-        desired_next = time.perf_counter() + iteration_duration
-        
-        gyro_x, gyro_y, gyro_z = sensor.gyro
-        result = [gyro_x, gyro_y, gyro_z]
-        if lpf_enabled:
-            result = apply_lpf(list((gyro_x, gyro_y, gyro_z)), sensor=0)
-        
-        results.append(result)
-        
-        sleep_time = desired_next - time.perf_counter()
-        if sleep_time > 0:
-            time.sleep(sleep_time)
-        
+    if lpf_enabled:
+        for row in results:
+            row[:] = apply_lpf(row, sensor=0)
     return results
 
 def calculate_fluctuations(samples):
-    fluctuations = []
-    index = 0
-    for sample in range(len(samples)-1):
-        fluctuation_x = abs(samples[index+1][0] - samples[index][0])
-        fluctuation_y = abs(samples[index+1][1] - samples[index][1])
-        fluctuation_z = abs(samples[index+1][2] - samples[index][2])
-        fluctuations.append([fluctuation_x, fluctuation_y, fluctuation_z])
-        index += 1    
-    return fluctuations
+    """Absolute sample to sample change per axis, (n, 3) samples -> (n-1, 3)"""
+    return np.abs(np.diff(np.asarray(samples, dtype=np.float64), axis=0))
 
 def calculate_fluctuations_avg(fluctuations):
-    fluctuations_x = []
-    fluctuations_y = []
-    fluctuations_z = []
-    
-    i = 0
-    for sample in fluctuations:
-        fluctuations_x.append(sample[0])
-        fluctuations_y.append(sample[1])
-        fluctuations_z.append(sample[2])
-        i += 1
-    
-    return [sum(fluctuations_x)/len(fluctuations), sum(fluctuations_y)/len(fluctuations), sum(fluctuations_z)/len(fluctuations)]
+    return fluctuations.mean(axis=0)
 
 def benchmark_accel_ranges(sensor, file):
     range_index = 0
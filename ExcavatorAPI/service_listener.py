@@ -1,9 +1,17 @@
 from time import sleep
+import os
 import socket
+import selectors
 import threading
 from dataclass_types import ExcavatorAPIProperties
 
 class ServiceListener:
+    RX_BUFFER_SIZE = 4096
+    SO_RCVBUF_SIZE = 256 * 1024
+    KEEPALIVE_IDLE = 30 # s before the first probe
+    KEEPALIVE_INTERVAL = 5 # s between probes
+    KEEPALIVE_COUNT = 3 # unanswered probes before the connection is dropped
+    
     def __init__(self, ip, port, service_name, cleanup_cb=None):
         """
         Initialize the ServiceListener.
@@ -18,11 +26,18 @@ class ServiceListener:
         self.cleanup_cb=cleanup_cb
         self.service_name = service_name
         self.stop_event = threading.Event()
+        # Written on close so the receive loop wakes up from select immediately.
+        # Lives only while start() is in its receive loop, the lock keeps close() from writing to a closed fd
+        self._stop_fd = None
+        self._stop_fd_lock = threading.Lock()
         self.running=False
         self.socket = None
         self.client_socket = None
         self.client_address = None 
         self.listener_thread=None
+        # Received messages are read into the same buffer for the listeners lifetime
+        self._rx_buf = bytearray(ServiceListener.RX_BUFFER_SIZE)
+        self._rx_mv = memoryview(self._rx_buf)
     
     def wait_for_ready(self, n=9):
         """Polls ready for n seconds"""
@@ -43,6 +58,8 @@ class ServiceListener:
         # Create TCP socket
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Set before listen so the accepted socket inherits it and the window scale is negotiated with it
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, ServiceListener.SO_RCVBUF_SIZE)
         self.socket.bind((self.ip, self.port))
         
         # Listen for incoming connection
@@ -52,37 +69,62 @@ class ServiceListener:
         # Accept a single client connection
         self.client_socket, self.client_address = self.socket.accept()
         print(f"[Service Manger - {self.service_name}] Client connected from {self.client_address}")
+        self._tune_client_socket()
         
-        # Message receiving loop
-        while not self.stop_event.is_set():
-            try:
-                # Set a timeout to allow checking stop_event periodically
-                self.client_socket.settimeout(1.0)
-                message = self.client_socket.recv(1024)
-                
-                if message:
-                    print(f"[Service Manger - {self.service_name}] Received: {message.decode('utf-8', errors='ignore')}")
-                else:
-                    # Empty message means client disconnected
-                    print(f"[Service Manger - {self.service_name}] Client disconnected")
-                    break
+        # Message receiving loop, sleeps in epoll until there is data or close() is called
+        with self._stop_fd_lock:
+            self._stop_fd = os.eventfd(0, os.EFD_NONBLOCK)
+        sel = selectors.EpollSelector()
+        sel.register(self.client_socket, selectors.EVENT_READ)
+        sel.register(self._stop_fd, selectors.EVENT_READ)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    events = sel.select()
+                    if any(key.fd == self._stop_fd for key, _ in events):
+                        break
+                    n = self.client_socket.recv_into(self._rx_mv, ServiceListener.RX_BUFFER_SIZE)
                     
-            except socket.timeout:
-                # Timeout is expected, just continue checking stop_event
-                continue
-            except Exception as e:
-                print(f"[Service Manger - {self.service_name}] Error while listening for service: {self.service_name} - e: {e}")
-                if self.cleanup_cb is not None:
-                    self.cleanup_cb()
-                break
+                    # Linux turns quickack off again after acking, re-arm it for the next message
+                    self.client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+                    if n:
+                        print(f"[Service Manger - {self.service_name}] Received: {str(self._rx_mv[:n], 'utf-8', errors='ignore')}")
+                    else:
+                        # Empty message means client disconnected
+                        print(f"[Service Manger - {self.service_name}] Client disconnected")
+                        break
+                        
+                except Exception as e:
+                    print(f"[Service Manger - {self.service_name}] Error while listening for service: {self.service_name} - e: {e}")
+                    if self.cleanup_cb is not None:
+                        self.cleanup_cb()
+                    break
+        finally:
+            sel.close()
+            with self._stop_fd_lock:
+                os.close(self._stop_fd)
+                self._stop_fd = None
         
     
+    def _tune_client_socket(self):
+        """Small messages go out without Nagle or delayed ack waits, dead clients are noticed through keepalive"""
+        sock = self.client_socket
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, ServiceListener.KEEPALIVE_IDLE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, ServiceListener.KEEPALIVE_INTERVAL)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, ServiceListener.KEEPALIVE_COUNT)
+    
     def close(self, calling_thread):
         """
         Clean up all resources. Sets the stop event and closes all sockets.
         """
         print(f"[Service Manger - {self.service_name}] Closing service listener")
         self.stop_event.set()
+        with self._stop_fd_lock:
+            if self._stop_fd is not None:
+                os.eventfd_write(self._stop_fd, 1)
         
         if self.client_socket:
             try:
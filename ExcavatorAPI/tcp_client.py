@@ -1,19 +1,27 @@
 import threading
-from time import sleep
+from time import sleep, perf_counter
 from typing import List
 from udp_socket import UDPSocket
 from dataclass_types import ExcavatorAPIProperties
-from utils import setup_logging
+from utils import setup_logging, setup_queued_logger
 
-from random import uniform
 import json
+from enum import IntEnum
+from types import MappingProxyType
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # Linux/macOS only, the client falls back to the stdlib loop elsewhere (e.g. Windows)
+    import uvloop
+except ImportError:
+    uvloop = None
 import asyncio
 import logging
 import atexit
 import websockets
-import psutil
-import multiprocessing
-import os
+import numpy as np
 
 # Maps to which index to read from in the controller loop
 controller_channelname_map={
@@ -23,28 +31,118 @@ controller_channelname_map={
     "rotate": 3
 }
 
-EVENTS={"handshake","screen_message_displayed","configuration","status","started_screen","started_mirroring","started_driving","stopped_driving","stopped_mirroring","started_driving_and_mirroring","stopped_driving_and_mirroring","stopped_screen","error"}
-
-def simulate_joystick_data(channel_names):
-    inputs = []
-    deadzone=0.2
-    for i in range(4):
-        new_val=uniform(-1, 1)
-        if not (abs(new_val) > deadzone):
-            new_val=0
-        inputs.append(new_val)
-
-    mapped_inputs=[]
-    for channel_name in channel_names:
-        mapped_inputs.append(inputs[controller_channelname_map[channel_name]])
-    return mapped_inputs
+# orjson when it is installed, the server expects text frames so its bytes are decoded
+if orjson is not None:
+    def json_dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+    json_loads = orjson.loads
+else:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+# Commands without parameters, serialized once
+STATIC_COMMANDS={action: json_dumps({"action": action}) for action in (
+    "start_screen", "stop_screen",
+    "get_screen_config", "get_excavator_config", "get_pwm_config", "get_orientation_tracker_config", "get_all_configs",
+    "stop_driving_and_mirroring", "stop_driving", "stop_mirroring",
+    "status_screen", "status_orientation_tracker", "status_udp",
+)}
+
+class Transition(IntEnum):
+    """Lifecycle step of the current operation, at most one operation is ever in transition"""
+    NONE = 0
+    STARTING = 1
+    STOPPING = 2
+
+class Event(IntEnum):
+    """Events sent by the server. Frames may carry either the integer or the legacy string name"""
+    HANDSHAKE = 0
+    SCREEN_MESSAGE_DISPLAYED = 1
+    CONFIGURATION = 2
+    STATUS = 3
+    STARTED_SCREEN = 4
+    STARTED_MIRRORING = 5
+    STARTED_DRIVING = 6
+    STOPPED_DRIVING = 7
+    STOPPED_MIRRORING = 8
+    STARTED_DRIVING_AND_MIRRORING = 9
+    STOPPED_DRIVING_AND_MIRRORING = 10
+    STOPPED_SCREEN = 11
+    ERROR = 12
+
+# Indexed by Event, the wire names are also what wait_state/current_state use
+EVENT_NAMES = tuple(e.name.lower() for e in Event)
+EVENTS_BY_NAME = MappingProxyType({name: Event(i) for i, name in enumerate(EVENT_NAMES)})
+
+# Operation ids, compared as ints. The names are only looked up for logging
+OP_NONE = ExcavatorAPIProperties.OPERATIONS["none"]
+OP_MIRRORING = ExcavatorAPIProperties.OPERATIONS["mirroring"]
+OP_DRIVING = ExcavatorAPIProperties.OPERATIONS["driving"]
+OP_DRIVING_AND_MIRRORING = ExcavatorAPIProperties.OPERATIONS["driving_and_mirroring"]
+
+STATE_EVENT_LOGS = {
+    Event.STARTED_SCREEN: "Screen has been started",
+    Event.STARTED_MIRRORING: "Mirroring has been started",
+    Event.STARTED_DRIVING: "driving operation has started",
+    Event.STARTED_DRIVING_AND_MIRRORING: "started_driving_and_mirroring operation has started",
+    Event.STOPPED_DRIVING: "driving operation has stopped",
+    Event.STOPPED_MIRRORING: "mirroring operation has stopped",
+    Event.STOPPED_DRIVING_AND_MIRRORING: "driving&mirroring operation has stopped",
+    Event.STOPPED_SCREEN: "Screen has been stopped",
+}
 
-def controller_poller_loop(controller_stop_queue, controller_data_queue, polling_rate, channel_names):
-    controller_data_queue.put(os.getpid())
+rng=np.random.default_rng()
+SIMULATED_DEADZONE=0.2
+
+def simulate_joystick_data(channel_index):
+    """Random joystick values for the controller indices in channel_index (see controller_channel_index)"""
+    inputs=rng.uniform(-1, 1, len(controller_channelname_map))
+    inputs[np.abs(inputs) <= SIMULATED_DEADZONE]=0.0
+    return inputs[channel_index]
+
+def controller_channel_index(channel_names):
+    return np.array([controller_channelname_map[name] for name in channel_names], dtype=np.intp)
+
+class SlotStatus(IntEnum):
+    """State of the controller thread behind a ControllerSlot"""
+    RUNNING = 0
+    STOPPED = 1
+    CRASHED = 2
+
+class ControllerSlot:
+    """Latest controller inputs, written by the controller thread and read by the driving thread.
+    Newest write always wins, nothing is queued. Every write publishes a new list with one reference
+    assignment, which is atomic under the GIL, so neither side takes a lock"""
+    def __init__(self, num_channels):
+        self._latest = [0.0] * num_channels
+        self._last_read = None
+        self.status = SlotStatus.RUNNING
+
+    def write(self, inputs):
+        # Never mutated after this, readers may hold on to it
+        self._latest = np.asarray(inputs, dtype=np.float64).tolist()
+
+    def read(self):
+        """Newest inputs as a list, None if nothing was written since the last read (inputs unchanged)"""
+        latest = self._latest
+        if latest is self._last_read:
+            return None
+        self._last_read = latest
+        return latest
+
+# Unchanged ticks in a row before the poller starts stretching its period, and the longest period as a multiple
+CONTROLLER_IDLE_TICKS=32
+CONTROLLER_MAX_BACKOFF=4
+
+def controller_poller_loop(controller_stop_event, slot, polling_rate, channel_names, logger, on_exit=None):
     sleep_time=1/polling_rate
-    logger=setup_logging("controller_poller")
-    previous_inputs=[0]*len(channel_names)
+    period=sleep_time
+    unchanged_ticks=0
+    controller=None
     simulation=True
+    # Controller indices of the driven channels, resolved once instead of per tick
+    channel_index=controller_channel_index(channel_names)
+    previous_inputs=np.zeros(len(channel_names), dtype=np.float64)
     try:
         try:
             from services.NiDAQ_controller import NiDAQJoysticks
@@ -52,47 +150,51 @@ def controller_poller_loop(controller_stop_queue, controller_data_queue, polling
             simulation=False
         except Exception:
             logger.error("Could not import nidaq controllers. Using simulated values instead")
-        logger.info("[Controller Process] Controller poller loop has started")
+        logger.info("[Controller Thread] Controller poller loop has started")
+        next_deadline=perf_counter()
         while True:
-            new_value=False
             if simulation is True:
-                inputs=simulate_joystick_data(channel_names=channel_names)
+                inputs=simulate_joystick_data(channel_index)
             else:
                 ai_values, di_values = controller.read()
-                inputs = [0]*len(channel_names)
-                for j, chan_name in enumerate(channel_names):
-                    inputs[j]=(ai_values[controller_channelname_map[chan_name]])
-
-            # Only update the que if there is a new value
-            for i, input in enumerate(inputs):
-                if previous_inputs[i] != input:
-                    new_value=True
-                    break
-
-            # Update the queue only if its empty
-            if controller_data_queue.empty() and new_value:
-                controller_data_queue.put(inputs)
-                previous_inputs = [0]*len(channel_names)
-            elif not controller_data_queue.empty() and new_value:
-                # Update the non consumed queue
-                prev_queue_vals=controller_data_queue.get()
-                for i, prev_val in enumerate(prev_queue_vals):
-                    # Only update if the prev value was 0
-                    if prev_val != inputs[i] and prev_val == 0:
-                        prev_queue_vals[i]=prev_val
-                controller_data_queue.put(prev_queue_vals)
-                previous_inputs = [0]*len(channel_names)
-
-            # Check for stop signal
-            if not controller_stop_queue.empty():
-                logger.info("[Controller Process] Received shutdown signal")
+                inputs = np.asarray(ai_values)[channel_index]
+
+            # Only changes are published, the slot keeps holding the current inputs otherwise.
+            # Overwrites whatever the driver thread has not consumed yet
+            if not np.array_equal(previous_inputs, inputs):
+                slot.write(inputs)
+                previous_inputs[:] = inputs
+                unchanged_ticks=0
+                period=sleep_time
+            else:
+                unchanged_ticks+=1
+                # Idle joysticks are polled less often, first change snaps back to the full rate
+                if unchanged_ticks >= CONTROLLER_IDLE_TICKS and period < sleep_time*CONTROLLER_MAX_BACKOFF:
+                    period=min(period*2, sleep_time*CONTROLLER_MAX_BACKOFF)
+                    unchanged_ticks=0
+
+            # Absolute deadlines so the period doesn't drift, a late tick restarts the schedule instead of bursting
+            next_deadline+=period
+            now=perf_counter()
+            if next_deadline < now:
+                next_deadline=now
+            # Sleeps and checks for the stop signal at once, shutdown doesn't wait out the period
+            if controller_stop_event.wait(timeout=next_deadline-now):
+                logger.info("[Controller Thread] Received shutdown signal")
                 break
-            sleep(sleep_time)
-        logger.info("[Controller Process] Controller poller loop has exited")
+        logger.info("[Controller Thread] Controller poller loop has exited")
     except Exception as e:
-        logger.error(f"[Controller Process] Controller poller crashed: {e}")
-        controller.close()
-        controller_data_queue.put("^")
+        logger.error(f"[Controller Thread] Controller poller crashed: {e}")
+        if controller is not None:
+            controller.close()
+        slot.status=SlotStatus.CRASHED
+    finally:
+        # Held inputs must not outlive the controller
+        slot.write(np.zeros(len(channel_names), dtype=np.float64))
+        if slot.status is SlotStatus.RUNNING:
+            slot.status=SlotStatus.STOPPED
+        if on_exit is not None:
+            on_exit()
 
 def client_operation(func):
     def wrapper(self, *args, **kwargs):
@@ -102,67 +204,67 @@ def client_operation(func):
             raise RuntimeError("Can't perform client operation without a client object!")
         if not self.loop:
             raise RuntimeError("Can't find the event loop")
-        return func(self,*args,**kwargs)
+        # Building and scheduling a command is only logged on failure, one place for every operation
+        try:
+            return func(self,*args,**kwargs)
+        except Exception as e:
+            self.logger.error(f"{func.__name__}: {e}")
     return wrapper
 
 class TCPClient:
-    def __init__(self, srv_ip="10.214.33.25", srv_port=5432, controller_monitor_interval=7,controller_poll_rate=128, testing_enabled=False, socket_timeout=3, logging_level="INFO",client_timeout=5,mpi_enabled=False):
+    def __init__(self, srv_ip="10.214.33.25", srv_port=5432, controller_monitor_interval=7,controller_poll_rate=128, testing_enabled=False, socket_timeout=3, logging_level="INFO",client_timeout=5,mpi_enabled=False, message_callback=None):
         self.logger = setup_logging(filename="ExcavatorAPIClient",logging_level=logging_level)
+        # Optional callback(msg) for forwarding configuration and error events, called from the client thread
+        self.message_callback=message_callback
         # TCP Client
         self.client_run_thread=None
         self.client_timeout=client_timeout
         self.client_running = False
         self.loop=None
         self.shutdown_event = threading.Event()
+        self.ready_event = threading.Event()
         self.final_cleanup_done = threading.Event()
         self.stop_event = threading.Event()
         self.data_lock = threading.Lock()
         self.testing_enabled=testing_enabled
         self.socket_timeout=socket_timeout
-        self.current_operation = ExcavatorAPIProperties.OPERATIONS["none"]
+        self.current_operation = OP_NONE
         self.logging_level=logging_level
         self.srv_ip = srv_ip
         self.srv_port = srv_port
         self.client = None
 
+        # Replaces per operation starting/stopping flags, guarded by data_lock
+        self.transition=Transition.NONE
+
         # Mirroring
-        self.mirroring = False
         self._read_orientation_thread=None
         self.orientation_reading_rate=None
         self.orientation_reading_rate_tmp=None
-        self.mirroring_starting=False
-        self.mirroring_stopping=False
 
         # Controller
         self.controller_monitor_thread=None
         self.controller_monitor_interval=controller_monitor_interval
         self.controller_poll_rate=controller_poll_rate
-        self.controller_stop_queue=None
-        self.controller_data_queue=None
-        self.controller_pid=None
-        self.controller_process=None
+        self.controller_stop_event=None
+        self.controller_slot=None
+        self.controller_thread=None
+        # Resolved on the event loop when the poller thread has exited
+        self.controller_exited=None
 
         # Driving
-        self.driving=False
         self._driving_commands_thread=None
         self.drive_sending_rate=None
         self.drive_sending_rate_tmp=None
-        self.driving_starting=False
-        self.driving_stopping=False
         self.channel_names=None
 
-        # Driving&Mirroring
-        self.driving_and_mirroring=False
-        self.driving_and_mirroring_starting=False
-        self.driving_and_mirroring_stopping=False
-
         # UDP server
         self.udp_server = None
         self.num_outputs=0
         self.num_outputs_tmp=0
         self.num_inputs=0
-        self.udp_server_starting=False
-        self.udp_server_stopping=False
+        # Start/stop of the udp server in progress, guarded by data_lock
+        self.udp_transition=Transition.NONE
 
         # MPI
         self.mpi=None
@@ -170,26 +272,50 @@ class TCPClient:
 
         # Testing stoff
         self.errors_counter=0
+        self.completed_tests=0
         self.recent_config=None
         self.test_continuation_signal=threading.Event()
+        # Set when the connection to the server drops so waiters can fail fast
+        self.dead_event=threading.Event()
+        # Latest started_*/stopped_* event received from the server
+        self.current_state=None
+        self.state_event=threading.Event()
+        # Handlers indexed by Event, resolved once instead of walking an if/elif chain per message
+        handlers={
+            Event.HANDSHAKE: self._on_handshake,
+            Event.SCREEN_MESSAGE_DISPLAYED: self._on_screen_message_displayed,
+            Event.CONFIGURATION: self._on_configuration,
+            Event.STATUS: self._on_status,
+            Event.ERROR: self._on_error,
+        }
+        self._event_handlers=tuple(handlers.get(event, self._on_state) for event in Event)
+        # Per event logs of the handlers are written by a listener thread, not the event loop
+        self.event_logger, self.event_log_listener = setup_queued_logger(self.logger, "events")
+        self.event_log_running=False
+        self._operation_stoppers={
+            Event.STOPPED_DRIVING: self._stop_driving,
+            Event.STOPPED_MIRRORING: self._stop_mirroring,
+            Event.STOPPED_DRIVING_AND_MIRRORING: self._stop_driving_and_mirroring,
+        }
 
     def start(self):
         if self.client_running: return False
+        self.dead_event.clear()
+        self.ready_event.clear()
         self.client_run_thread=threading.Thread(target=self._run_client_async, daemon=True)
         self.client_run_thread.start()
 
-        # Poll until ready...
-        for _ in range(5):
-            if self.is_ready(): return True
-            sleep(1)
-        return False
+        # Set once connected, or once connecting has failed
+        self.ready_event.wait(timeout=5.0)
+        return self.is_ready()
 
     def is_ready(self):
         return self.client_running
 
     def _run_client_async(self):
         try:
-            self.loop=asyncio.new_event_loop()
+            # Only the client's own loop is uvloop, the process wide policy is left alone
+            self.loop=uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
             asyncio.set_event_loop(self.loop)
             self.loop.run_until_complete(self._start_client())
         except Exception as e:
@@ -206,7 +332,12 @@ class TCPClient:
                 self.client=websocket
                 self.logger.info(f"Client connected to WebSocket server at ws://{self.srv_ip}:{self.srv_port}")
                 atexit.register(self.shutdown)
+                # Only started once connected, a failed connect leaves nothing for shutdown() to stop
+                if not self.event_log_running:
+                    self.event_log_listener.start()
+                    self.event_log_running=True
                 self.client_running = True
+                self.ready_event.set()
                 asyncio.create_task(self._ws_receiver())
                 while not self.shutdown_event.is_set():
                     await asyncio.sleep(self.client_timeout)
@@ -215,21 +346,27 @@ class TCPClient:
             self.logger.error(f"Failed to find excavatorAPI {self.srv_ip}:{self.srv_port}")
         except Exception as e:
             self.logger.error(f"Failed to start the tcp client: {e}")
+        finally:
+            # Don't leave start() waiting out its timeout when connecting failed
+            self.ready_event.set()
 
     async def _ws_receiver(self):
         try:
             self.logger.info("Websocket has started listening for messages")
             while not self.stop_event.is_set():
                 try:
-                    message= await asyncio.wait_for(self.client.recv(), timeout=self.client_timeout)
+                    # Raw frame bytes, the json parser reads UTF-8 itself so the str decode is skipped
+                    message= await asyncio.wait_for(self.client.recv(decode=False), timeout=self.client_timeout)
                     await self.__handle_message(message)
                 except asyncio.TimeoutError:
                     continue
                 except websockets.exceptions.ConnectionClosed:
                     self.logger.info("Connection closed by the server")
+                    self.dead_event.set()
                     break
         except Exception as e:
             self.logger.error(f"Error while listening for messages: {e}")
+            self.dead_event.set()
 
         self.logger.info("TCPClient has stopped listening for messages...")
         await self.__cleanup_operation()
@@ -238,6 +375,36 @@ class TCPClient:
         with self.data_lock:
             self.client_running=False
 
+    def wait_state(self, expected_state, timeout=5):
+        """Blocks until the server has reported expected_state or the timeout runs out"""
+        deadline = perf_counter() + timeout
+        while self.current_state != expected_state:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                return False
+            self.state_event.clear()
+            if self.current_state == expected_state:
+                break
+            self.state_event.wait(remaining)
+        return True
+
+    def _set_state(self, state):
+        self.current_state = state
+        self.state_event.set()
+
+    # The running operation is only tracked in current_operation, these are views of it
+    @property
+    def mirroring(self):
+        return self.current_operation == OP_MIRRORING
+
+    @property
+    def driving(self):
+        return self.current_operation == OP_DRIVING
+
+    @property
+    def driving_and_mirroring(self):
+        return self.current_operation == OP_DRIVING_AND_MIRRORING
+
     def get_current_operation(self):
         if not self.client_running: return
         return ExcavatorAPIProperties.OPERATIONS_REVERSE[self.current_operation]
@@ -246,247 +413,176 @@ class TCPClient:
         asyncio.run_coroutine_threadsafe(self._send_data(data=data),self.loop)
 
     async def _send_data(self,data):
-        await self.client.send(json.dumps(data))
+        await self.client.send(json_dumps(data))
+
+    def send_raw(self, message):
+        """Sends an already serialized message, e.g. from STATIC_COMMANDS"""
+        asyncio.run_coroutine_threadsafe(self._send_raw(message=message),self.loop)
+
+    async def _send_raw(self, message):
+        await self.client.send(message)
 
     @client_operation
     def send_screen_message(self, header, body, render_count=1, render_time=10.0):
-        try:
-            command={
-                "action": "screen_message",
-                "render_count": render_count,
-                "render_time": render_time,
-                "body": body,
-                "header": header
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Client failed to send a message: {e}")
+        command={
+            "action": "screen_message",
+            "render_count": render_count,
+            "render_time": render_time,
+            "body": body,
+            "header": header
+        }
+        self.send_data(command)
 
     @client_operation
     def start_screen(self):
-        try:
-            command={
-                "action": "start_screen",
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Client failed to send a message: {e}")
+        self.send_raw(STATIC_COMMANDS["start_screen"])
 
     @client_operation
     def stop_screen(self):
-        try:
-            command={
-                "action": "stop_screen",
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Client failed to send a message: {e}")
+        self.send_raw(STATIC_COMMANDS["stop_screen"])
 
     @client_operation
     def get_screen_config(self):
-        try:
-            command={"action": "get_screen_config"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"get_screen_config: {e}")
+        self.send_raw(STATIC_COMMANDS["get_screen_config"])
     @client_operation
     def get_excavator_config(self):
-        try:
-            command={"action": "get_excavator_config"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"get_excavator_config: {e}")
+        self.send_raw(STATIC_COMMANDS["get_excavator_config"])
     @client_operation
     def get_pwm_config(self):
-        try:
-            command={"action": "get_pwm_config"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"get_pwm_config: {e}")
+        self.send_raw(STATIC_COMMANDS["get_pwm_config"])
     @client_operation
     def get_orientation_tracker_config(self):
-        try:
-            command={"action": "get_orientation_tracker_config"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"get_orientation_tracker_config: {e}")
+        self.send_raw(STATIC_COMMANDS["get_orientation_tracker_config"])
+
+    @client_operation
+    def get_all_configs(self):
+        self.send_raw(STATIC_COMMANDS["get_all_configs"])
 
     @client_operation
     def start_mirroring(self, orientation_send_rate=3):
         float(orientation_send_rate)
         self.orientation_reading_rate_tmp = orientation_send_rate
-        try:
-            command={
-                "action": "start_mirroring",
-                "orientation_send_rate": orientation_send_rate
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.info(f"Error at start_mirroring: {e}")
+        command={
+            "action": "start_mirroring",
+            "orientation_send_rate": orientation_send_rate
+        }
+        self.send_data(command)
 
     @client_operation
     def start_driving(self, channel_names: List[str], drive_sending_rate=3):
         self.drive_sending_rate_tmp=drive_sending_rate
         self.num_outputs_tmp = len(channel_names)
-        try:
-            command = {
-                "action": "start_driving",
-                "channel_names": channel_names,
-                "data_sending_rate": drive_sending_rate
-            }
-            self.channel_names=channel_names
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        command = {
+            "action": "start_driving",
+            "channel_names": channel_names,
+            "data_sending_rate": drive_sending_rate
+        }
+        self.channel_names=channel_names
+        self.send_data(command)
 
     @client_operation
     def start_driving_and_mirroring(self, channel_names, drive_sending_rate=2, orientation_send_rate=3):
         self.orientation_reading_rate_tmp=orientation_send_rate
         self.drive_sending_rate_tmp=drive_sending_rate
         self.num_outputs_tmp=len(channel_names)
-        try:
-            command={
-                "action":"start_driving_and_mirroring",
-                "channel_names": channel_names,
-                "data_sending_rate": drive_sending_rate,
-                "data_receiving_rate": orientation_send_rate
-            }
-            self.channel_names=channel_names
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        command={
+            "action":"start_driving_and_mirroring",
+            "channel_names": channel_names,
+            "data_sending_rate": drive_sending_rate,
+            "data_receiving_rate": orientation_send_rate
+        }
+        self.channel_names=channel_names
+        self.send_data(command)
 
     @client_operation
     def stop_driving_and_mirroring(self):
-        try:
-            command={"action":"stop_driving_and_mirroring"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        self.send_raw(STATIC_COMMANDS["stop_driving_and_mirroring"])
 
     @client_operation
     def stop_driving(self):
-        try:
-            command={"action": "stop_driving"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        self.send_raw(STATIC_COMMANDS["stop_driving"])
 
     @client_operation
     def stop_mirroring(self):
-        try:
-            command = {"action":"stop_mirroring"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at stop_mirroring: {e}")
+        self.send_raw(STATIC_COMMANDS["stop_mirroring"])
 
     @client_operation
     def configure_pwm_controller(self, pump=None, channel_configs=None):
-        try:
-            if pump == None and channel_configs == None:
-                raise ValueError("Either pump config or channel_configs have to be provided")
-            command={
-                "action":"configure_pwm_controller",
-            }
-            command["channel_configs"] = {}
-            if channel_configs:
-                command["channel_configs"].update(channel_configs)
-            if pump:
-                command["channel_configs"].update({"pump":pump})
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at configure_pwm_controller: {e}")
+        if pump == None and channel_configs == None:
+            raise ValueError("Either pump config or channel_configs have to be provided")
+        command={
+            "action":"configure_pwm_controller",
+        }
+        command["channel_configs"] = {}
+        if channel_configs:
+            command["channel_configs"].update(channel_configs)
+        if pump:
+            command["channel_configs"].update({"pump":pump})
+        self.send_data(command)
 
     @client_operation
     def add_pwm_channel(self, channel_name, channel_type, config):
-        try:
-            command={
-                "action": "add_pwm_channel",
-                "channel_name": channel_name,
-                "channel_type": channel_type,
-                "config": config
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        command={
+            "action": "add_pwm_channel",
+            "channel_name": channel_name,
+            "channel_type": channel_type,
+            "config": config
+        }
+        self.send_data(command)
 
     @client_operation
     def remove_pwm_channel(self, channel_name):
-        try:
-            command={
-                "action":"remove_pwm_channel",
-                "channel_name":channel_name
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at start_mirroring: {e}")
+        command={
+            "action":"remove_pwm_channel",
+            "channel_name":channel_name
+        }
+        self.send_data(command)
 
     @client_operation
     def configure_screen(self, default_render_time=None, font_size_header=None, font_size_body=None):
-        try:
-            command={
-                "action":"configure_screen",
-                "render_time":default_render_time,
-                "font_size_header": font_size_header,
-                "font_size_body": font_size_body
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at configure_screen: {e}")
+        command={
+            "action":"configure_screen",
+            "render_time":default_render_time,
+            "font_size_header": font_size_header,
+            "font_size_body": font_size_body
+        }
+        self.send_data(command)
     @client_operation
     def configure_excavator(self, has_screen=None):
-        try:
-            command={
-                "action":"configure_excavator",
-                "has_screen":has_screen
-            }
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at configure_screen: {e}")
+        command={
+            "action":"configure_excavator",
+            "has_screen":has_screen
+        }
+        self.send_data(command)
 
     @client_operation
     def configure_orientation_tracker(self,gyro_data_rate=None, accel_data_rate=None, gyro_range=None, accel_range=None, enable_lpf2=None,enable_simple_lpf=None,alpha=None,tracking_rate=None):
-        try:
-            # Convert False to 0 for filter params
-            enable_lpf2 = 0 if enable_lpf2 is False else 1
-            enable_simple_lpf = 0 if enable_simple_lpf is False else 1
-            # Build the command up!
-            command={"action": "configure_orientation_tracker"}
-            if gyro_data_rate is not None: command["gyro_data_rate"] = gyro_data_rate
-            if accel_data_rate is not None: command["accel_data_rate"]=accel_data_rate
-            if gyro_range is not None: command["gyro_range"]=gyro_range
-            if accel_range is not None: command["accel_range"]=accel_range
-            if enable_lpf2 is not None: command["enable_lpf2"]=enable_lpf2
-            if enable_simple_lpf is not None: command["enable_simple_lpf"]=enable_simple_lpf
-            if alpha is not None: command["alpha"]=alpha
-            if tracking_rate is not None: command["tracking_rate"]=tracking_rate
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at configure_screen: {e}")
+        # Convert False to 0 for filter params
+        enable_lpf2 = 0 if enable_lpf2 is False else 1
+        enable_simple_lpf = 0 if enable_simple_lpf is False else 1
+        # Build the command up!
+        command={"action": "configure_orientation_tracker"}
+        if gyro_data_rate is not None: command["gyro_data_rate"] = gyro_data_rate
+        if accel_data_rate is not None: command["accel_data_rate"]=accel_data_rate
+        if gyro_range is not None: command["gyro_range"]=gyro_range
+        if accel_range is not None: command["accel_range"]=accel_range
+        if enable_lpf2 is not None: command["enable_lpf2"]=enable_lpf2
+        if enable_simple_lpf is not None: command["enable_simple_lpf"]=enable_simple_lpf
+        if alpha is not None: command["alpha"]=alpha
+        if tracking_rate is not None: command["tracking_rate"]=tracking_rate
+        self.send_data(command)
 
     @client_operation
     def get_screen_status(self):
-        try:
-            command={"action":"status_screen"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at get_screen_status:  {e}")
+        self.send_raw(STATIC_COMMANDS["status_screen"])
 
     @client_operation
     def get_orientation_tracker_status(self):
-        try:
-            command={"action":"status_orientation_tracker"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at get_orientation_tracker_status:  {e}")
+        self.send_raw(STATIC_COMMANDS["status_orientation_tracker"])
 
     @client_operation
     def get_mirroring_status(self):
-        try:
-            command={"action":"status_udp"}
-            self.send_data(command)
-        except Exception as e:
-            self.logger.error(f"Error at get_orientation_tracker_status:  {e}")
+        self.send_raw(STATIC_COMMANDS["status_udp"])
 
     def set_log_level(self, level: str) -> None:
         """Change the logging level at runtime.
@@ -503,60 +599,44 @@ class TCPClient:
         self._read_orientation_thread.start()
         return True
 
-    def __start_controller_process(self):
+    def __start_controller_thread(self):
         with self.data_lock:
-            if self.controller_process is not None:
-                raise RuntimeError("Controller process already exists...?")
+            if self.controller_thread is not None:
+                raise RuntimeError("Controller thread already exists...?")
         self.__validate_rate(self.controller_poll_rate, context="self.controller_poll_rate")
 
-        self.controller_stop_queue=multiprocessing.Queue()
-        self.controller_data_queue=multiprocessing.Queue()
-        self.controller_process =multiprocessing.Process(
+        self.controller_stop_event=threading.Event()
+        self.controller_slot=ControllerSlot(len(self.channel_names))
+        self.controller_exited=self.loop.create_future()
+        exited=self.controller_exited
+        loop=self.loop
+        def on_exit():
+            loop.call_soon_threadsafe(lambda: exited.done() or exited.set_result(None))
+        self.controller_thread=threading.Thread(
             target=controller_poller_loop,
-            args=(self.controller_stop_queue, self.controller_data_queue, self.controller_poll_rate, self.channel_names),
+            args=(self.controller_stop_event, self.controller_slot, self.controller_poll_rate, self.channel_names, self.logger, on_exit),
             daemon=True
         )
-        self.controller_process.start()
-        self.controller_pid=self.controller_data_queue.get()
-        self.logger.info(f"Controller poller process has been started with pid: {self.controller_pid}")
+        self.controller_thread.start()
+        self.logger.info("Controller poller thread has been started")
 
-    def __reset_controller_process_values(self):
+    def __reset_controller_thread_values(self):
         with self.data_lock:
-            self.controller_process=None
-            self.controller_data_queue=None
-            self.controller_stop_queue=None
-            self.controller_pid=None
-
-    async def __shutdown_controller_process(self):
-        self.logger.info("Shutting down controller process")
-        
-        # Always check if the PID actually exists first
-        if self.controller_pid is not None:
+            self.controller_thread=None
+            self.controller_slot=None
+            self.controller_stop_event=None
+            self.controller_exited=None
+
+    async def __shutdown_controller_thread(self):
+        self.logger.info("Shutting down controller thread")
+        if self.controller_thread is not None:
+            self.controller_stop_event.set()
+            # The poller resolves controller_exited on its way out, no thread is parked on a join meanwhile
             try:
-                self.controller_stop_queue.put(1)
-                for _ in range(int(ExcavatorAPIProperties.SHUTDOWN_GRACE_PERIOD)):
-                    await asyncio.sleep(1)
-                    p = psutil.Process(self.controller_pid)
-                    self.logger.debug(f"Process status: {p.status()}, cmdline: {p.cmdline()}")
-            except psutil.NoSuchProcess:
-                self.logger.info("Controller process shutdown...")
-                self.__reset_controller_process_values()
-                return
-
-            self.logger.warning("Controller not responding. Force killing...")
-            try:
-                p = psutil.Process(self.controller_pid)
-                p.kill()
-                await asyncio.sleep(1)
-            except psutil.NoSuchProcess:
-                return 
-
-            if not psutil.pid_exists(self.controller_pid):
-                self.__reset_controller_process_values()
-            else:
-                self.logger.error(f"Failed to shutdown controller process with pid: {self.controller_pid}")
-        else: # Does not exist
-            self.__reset_controller_process_values()
+                await asyncio.wait_for(asyncio.shield(self.controller_exited), ExcavatorAPIProperties.SHUTDOWN_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                self.logger.error("Controller thread did not exit in time")
+        self.__reset_controller_thread_values()
 
     def __start_driving_threads(self):
         if self._driving_commands_thread is not None and self._driving_commands_thread.is_alive():
@@ -579,21 +659,46 @@ class TCPClient:
         if rate < ExcavatorAPIProperties.MIN_RATE:
             raise RuntimeError(f"Rate {context}: {rate} can't be smaller than {ExcavatorAPIProperties.MIN_RATE}")
 
+    @staticmethod
+    def __sleep_until(deadline):
+        """Sleeps until the perf_counter deadline so loop work doesn't stretch the period.
+        Returns the deadline to schedule from, a late tick restarts the schedule instead of bursting"""
+        now=perf_counter()
+        if deadline <= now:
+            return now
+        sleep(deadline-now)
+        return deadline
+
     def __drive_commands_loop(self):
         try:
             sleep_time=1/self.drive_sending_rate
             self.__validate_rate(rate=self.drive_sending_rate, context="drive sending rate")
             self.logger.info(f"drive_commands_loop started. Sleep time: {sleep_time}")
-            while not self.stop_event.is_set():
-                command_values=[0] * self.num_outputs
-                if self.controller_process is not None and not self.controller_data_queue.empty():
-                    command_values = self.controller_data_queue.get()
-                    # Check for error signal [^]
-                    if not isinstance(command_values, list):
-                        raise RuntimeError("Received error signal from the controller process")
-                if self.udp_server:
-                    self.udp_server.send(command_values)
-                sleep(sleep_time)
+            command_values=[0] * self.num_outputs
+            # Packed once per change of the inputs, held inputs resend the same packet
+            packet=None
+            # Bound once, the loop body then only does local loads
+            stopped=self.stop_event.is_set
+            sleep_until=self.__sleep_until
+            next_deadline=perf_counter()
+            while not stopped():
+                slot=self.controller_slot
+                if self.controller_thread is not None and slot is not None:
+                    # A stopped controller has published zeros, those are held like any other inputs
+                    if slot.status is SlotStatus.CRASHED:
+                        raise RuntimeError("Received error signal from the controller thread")
+                    # The controller only writes on change, no new write means the inputs are held
+                    new_values = slot.read()
+                    if new_values is not None:
+                        command_values = new_values
+                        packet=None
+                udp_server=self.udp_server
+                if udp_server:
+                    if packet is None:
+                        packet=udp_server.pack(command_values)
+                    if packet is not None:
+                        udp_server.send_packet(packet)
+                next_deadline=sleep_until(next_deadline+sleep_time)
 
             self.logger.info("Driving commands sending loop exited")
         except Exception as e:
@@ -605,35 +710,37 @@ class TCPClient:
             sleep_time=1/self.orientation_reading_rate
             self.__validate_rate(rate=self.orientation_reading_rate, context="self.orientation_reading_rate")
             self.logger.info(f"orientation reading loop started. Sleep time: {sleep_time}")
-            while not self.stop_event.is_set():
+            stopped=self.stop_event.is_set
+            sleep_until=self.__sleep_until
+            next_deadline=perf_counter()
+            while not stopped():
                 if self.udp_server:
                     orientation=self.udp_server.get_latest()
                     if orientation is not None and self.mpi is not None:
                         self.mpi.set_angles(orientation[0],orientation[1])
                     else:
                         self.logger.info(f"orientation: {orientation}")
-                sleep(sleep_time)
+                next_deadline=sleep_until(next_deadline+sleep_time)
             self.logger.info("Orientation reading loop exited")
         except Exception as e:
             self.logger.error(f"Error occured in read_orientatioN_loop: {e}")
             self._cleanup_operation()
 
     async def _start_driving(self):
+        # current_operation is only set under the lock, a stale snapshot here just means the locked check decides
+        if self.driving: return True
+        # Another operation running is rejected without the lock, the locked check below stays authoritative
+        if not self.__check_operation(): return False
         with self.data_lock:
             if self.driving:
                 return True
             if not self.__check_operation(): return False
-            if self.driving_starting or self.driving_stopping:
-                self.logger.warning("_start_driving: driving in transition")
-                return False
-            self.driving_starting=True
+            if not self.__claim_transition("transition", Transition.STARTING, "_start_driving: driving in transition"): return False
             self.drive_sending_rate=self.drive_sending_rate_tmp
             self.num_outputs=self.num_outputs_tmp
+            self.current_operation=OP_DRIVING
         try:
             error=False
-            with self.data_lock:
-                self.driving = True
-                self.current_operation=ExcavatorAPIProperties.OPERATIONS["driving"]
             await self.__start_driving_services()
             self.logger.info("Driving operation has started")
             return True
@@ -642,19 +749,17 @@ class TCPClient:
             error=True
             return False
         finally:
-            with self.data_lock:
-                self.driving_starting=False
+            # Only the transition owner ends it and nobody else writes while it's set, a single store needs no lock
+            self.transition=Transition.NONE
             if error:
                 await self._stop_driving()
 
     async def _stop_driving(self):
+        if not self.driving: return True
         with self.data_lock:
             if not self.driving:
                 return True
-            if self.driving_starting or self.driving_stopping:
-                self.logger.warning("_stop_driving: Driving in transtition.")
-                return False
-            self.driving_stopping=True
+            if not self.__claim_transition("transition", Transition.STOPPING, "_stop_driving: Driving in transtition."): return False
         try:
             await self._stop_driving_services()
             return True
@@ -668,52 +773,47 @@ class TCPClient:
         self.logger.info("Starting driving services...")
         if not self.__start_udp_server(num_inputs=0, num_outputs=self.num_outputs):
             raise RuntimeError("Failed to start udp server")
-        self.__start_controller_process()
+        self.__start_controller_thread()
         if not self.__start_driving_threads():
             raise RuntimeError("failed __start_driving_threads")
 
     async def _stop_driving_services(self):
         self.logger.info("Stopping driving services...")
         self.stop_event.set()
-        await self.__shutdown_controller_process()
+        # Driving thread reads the controller slot, it has to stop before the slot is released
         self.__stop_driving_threads()
+        await self.__shutdown_controller_thread()
         if self.udp_server and not self.__stop_udp_server():
             raise RuntimeError("Failed to close UDP server")
 
     async def _start_driving_and_mirroring(self):
+        if self.driving_and_mirroring: return True
+        if not self.__check_operation(): return False
         with self.data_lock:
             if self.driving_and_mirroring: return True
             if not self.__check_operation(): return False
-            if self.driving_and_mirroring_stopping or self.driving_and_mirroring_starting:
-                self.logger.warning("start_driving_and_mirroring: Operation in transition")
-                return False
-            self.driving_and_mirroring_starting = True
+            if not self.__claim_transition("transition", Transition.STARTING, "start_driving_and_mirroring: Operation in transition"): return False
             self.orientation_reading_rate=self.orientation_reading_rate_tmp
             self.drive_sending_rate=self.drive_sending_rate_tmp
             self.num_outputs=self.num_outputs_tmp
+            self.current_operation=OP_DRIVING_AND_MIRRORING
         try:
             error=False
-            with self.data_lock:
-                self.driving_and_mirroring = True
-                self.current_operation=ExcavatorAPIProperties.OPERATIONS["driving_and_mirroring"]
             await self.__start_driving_and_mirroring_services()
             return True
         except Exception as e:
             self.logger.error(f"Failed to start driving and mirroring: {e}")
             error=True
         finally:
-            with self.data_lock:
-                self.driving_and_mirroring_starting = False
+            self.transition=Transition.NONE
             if error:
                 await self._stop_driving_and_mirroring()
 
     async def _stop_driving_and_mirroring(self):
+        if not self.driving_and_mirroring: return True
         with self.data_lock:
             if not self.driving_and_mirroring: return True
-            if self.driving_and_mirroring_stopping or self.driving_and_mirroring_starting:
-                self.logger.warning("stop_driving_and_mirroring: Operation in transition already")
-                return False
-            self.driving_and_mirroring_stopping = True
+            if not self.__claim_transition("transition", Transition.STOPPING, "stop_driving_and_mirroring: Operation in transition already"): return False
         try:
             self.logger.info(f"Stopping driving and mirroring operation")
             await self._stop_driving_and_mirroring_services()
@@ -729,7 +829,7 @@ class TCPClient:
         if not self.__start_udp_server(num_inputs=3, num_outputs=self.num_outputs):
             raise RuntimeError("Failed to start udp client")
         if self.mpi_enabled: self._start_mpi()
-        self.__start_controller_process()
+        self.__start_controller_thread()
         if not self.__start_driving_threads():
             raise RuntimeError("failed __start_driving_threads")
         if not self.__start_mirroring_threads():
@@ -741,8 +841,9 @@ class TCPClient:
         if self.udp_server: self.__stop_udp_server()
         if self.mpi_enabled: self._stop_mpi()
         self.__stop_mirroring_threads()
-        await self.__shutdown_controller_process()
+        # Driving thread reads the controller slot, it has to stop before the slot is released
         self.__stop_driving_threads()
+        await self.__shutdown_controller_thread()
 
     def _start_mpi(self):
         from services.motionplatform_interface import MotionPlatformInterface
@@ -754,19 +855,16 @@ class TCPClient:
         self.mpi = None
 
     async def _start_mirroring(self):
+        if self.mirroring: return True
+        if not self.__check_operation(): return False
         with self.data_lock:
             if self.mirroring: return True
             if not self.__check_operation(): return False
-            if self.mirroring_stopping or self.mirroring_starting:
-                self.logger.info("_start_mirroring: Mirroring in transition")
-                return False
-            self.mirroring_starting=True
+            if not self.__claim_transition("transition", Transition.STARTING, "_start_mirroring: Mirroring in transition"): return False
             self.orientation_reading_rate=self.orientation_reading_rate_tmp
+            self.current_operation = OP_MIRRORING
         try:
             error=False
-            with self.data_lock:
-                self.mirroring=True
-                self.current_operation = ExcavatorAPIProperties.OPERATIONS["mirroring"]
             await self.__start_mirroring_services()
             return True
         except Exception as e:
@@ -774,18 +872,15 @@ class TCPClient:
             error=True
             return False
         finally:
-            with self.data_lock:
-                self.mirroring_starting=False
+            self.transition=Transition.NONE
             if error:
                 await self._stop_mirroring()
 
     async def _stop_mirroring(self):
+        if not self.mirroring: return True
         with self.data_lock:
             if not self.mirroring: return True
-            if self.mirroring_starting or self.mirroring_stopping:
-                self.logger.info(f"_stop_mirroring: mirroring in transition")
-                return False
-            self.mirroring_stopping=True
+            if not self.__claim_transition("transition", Transition.STOPPING, "_stop_mirroring: mirroring in transition"): return False
         try:
             await self.__stop_mirroring_services()
             self.logger.info("Mirroring stopped")
@@ -813,13 +908,11 @@ class TCPClient:
             raise RuntimeError("Failed to close UDP server")
 
     def __start_udp_server(self, num_outputs, num_inputs):
+        if self.udp_server: return True
         with self.data_lock:
             if self.udp_server:
                 return True
-            if self.udp_server_starting or self.udp_server_stopping:
-                self.logger.info("start_udp_server: UDP server in transition")
-                return False
-            self.udp_server_starting=True
+            if not self.__claim_transition("udp_transition", Transition.STARTING, "start_udp_server: UDP server in transition"): return False
         try:
             error=False
             max_age_seconds = 1
@@ -838,19 +931,16 @@ class TCPClient:
             error=True
             return False
         finally:
-            with self.data_lock:
-                self.udp_server_starting = False
+            self.udp_transition=Transition.NONE
             if error:
                 self.__stop_udp_server()
 
     def __stop_udp_server(self):
+        if not self.udp_server: return True
         with self.data_lock:
             if not self.udp_server:
                 return True
-            if self.udp_server_starting or self.udp_server_stopping:
-                self.logger.warning("__stop_udp_server: UDP server in transition")
-                return False
-            self.udp_server_stopping=True
+            if not self.__claim_transition("udp_transition", Transition.STOPPING, "__stop_udp_server: UDP server in transition"): return False
         try:
             self.udp_server.close()
             self.udp_server = None
@@ -860,141 +950,136 @@ class TCPClient:
             self.logger.error(f"Failed to stop UDP server: {e}")
             return False
         finally:
-            with self.data_lock:
-                self.udp_server_stopping=False
+            self.udp_transition=Transition.NONE
 
     async def __cleanup_operation(self):
-        current_operation=self.get_current_operation()
-        if current_operation == "none":
+        current_operation=self.current_operation
+        if current_operation == OP_NONE:
             self.logger.warning("Can't cleanup operation. Current operation is none?")
             return
-        elif current_operation == "mirroring":
+        elif current_operation == OP_MIRRORING:
             await self._stop_mirroring()
-        elif current_operation == "driving":
+        elif current_operation == OP_DRIVING:
             await self._stop_driving()
-        elif current_operation == "driving_and_mirroring":
+        elif current_operation == OP_DRIVING_AND_MIRRORING:
             await self._stop_driving_and_mirroring()
         else:
             self.logger.error(f"Unknown current operation: {current_operation}")
 
-    def _cleanup_operation(self):
-        asyncio.run_coroutine_threadsafe(self.__cleanup_operation(),self.loop).result(timeout=ExcavatorAPIProperties.SHUTDOWN_GRACE_PERIOD)
+    def _cleanup_operation(self, wait=False):
+        """Schedules the operation cleanup on the event loop. Worker threads calling this on a crash
+        don't wait, the cleanup joins those same threads so they have to be free to exit"""
+        future=asyncio.run_coroutine_threadsafe(self.__cleanup_operation(),self.loop)
+        if wait:
+            future.result(timeout=ExcavatorAPIProperties.SHUTDOWN_GRACE_PERIOD)
 
     async def __handle_message(self, message):
         try:
-            message=json.loads(message)
+            message=json_loads(message)
         except Exception:
             self.logger.error("Message was not in json format")
             return
         event=message.get("event")
         if event is None:
-            self.logger.error(f"No event in the message: {message}")
+            self.logger.error("No event in the message: %s", message)
             return
 
-        if not (event in EVENTS):
-            self.logger.error(f"Unknown event: {event}")
+        # Integer frames index the enum directly, string frames go through the name table
+        if type(event) is int:
+            event = Event(event) if 0 <= event < len(EVENT_NAMES) else None
+        else:
+            event = EVENTS_BY_NAME.get(event)
+        if event is None:
+            self.logger.error(f"Unknown event: {message.get('event')}")
             return
 
-        print(f"[Client]: event: {event}")
+        # Skips the name lookup and the logging call per message unless DEBUG is on
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("[Client]: event: %s", EVENT_NAMES[event])
         try:
-            if event=="handshake":
-                operation = message.get("operation")
-                if operation is None:
-                    self.logger.error("Operation not provided in a handshake event")
-                    return
-                self.logger.info(f"Received handshake for operation: {operation}")
-                if operation=="mirroring":
-                    if not await self._start_mirroring():
-                        raise RuntimeError("Failed to inititate mirroring services...")
-                elif operation=="driving":
-                    if not await self._start_driving():
-                        raise RuntimeError("Failed to inititate driving services...")
-                elif operation=="driving_and_mirroring":
-                    if not await self._start_driving_and_mirroring():
-                        raise RuntimeError("Failed to inititate driving&mirroring services...")
-            elif event=="screen_message_displayed":
-                self.logger.info(f"[Server] Screen message has been added to the render queue")
-                if self.testing_enabled:
-                        self.test_continuation_signal.set()
-            elif event=="configuration":
-                # Get the configuration target
-                target = message.get("target")
-                context = message.get("context")
-                config = message.get("config")
-                if config is None:
-                    self.logger.error("Config not found.")
-                    return
-                try:
-                    config = json.loads(config)
-                except Exception:
-                    self.logger.error("Config is not in json format.")
-                    return
-                if config is not None:
-                    self.logger.debug(f"[Server] Config for {target}: {config} ")
-                    if self.testing_enabled:
-                        self.recent_config=config
-                        self.test_continuation_signal.set()
-                else:
-                    self.logger.error(f"get_config received undefined config: {message}")
-                    if self.testing_enabled:
-                        self.errors_counter+=1
-                    return
-            elif event=="status":
-                status=message.get("status")
-                if status is None:
-                    self.logger.error("Status not provided in the message")
-                    return
-                self.logger.info(f"Received status: {status}")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="started_screen":
-                self.logger.info(f"[Server] Screen has been started")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="started_mirroring":
-                self.logger.info(f"[Server] Mirroring has been started")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="started_driving":
-                self.logger.info(f"[Server] driving operation has started")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="started_driving_and_mirroring":
-                self.logger.info(f"[Server] started_driving_and_mirroring operation has started")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="stopped_driving":
-                self.logger.info(f"[Server] driving operation has stopped")
-                await self._stop_driving()
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="stopped_mirroring":
-                self.logger.info(f"[Server] mirroring operation has stopped")
-                await self._stop_mirroring()
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="stopped_driving_and_mirroring":
-                self.logger.info(f"[Server] driving&mirroring operation has stopped")
-                await self._stop_driving_and_mirroring()
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="stopped_screen":
-                self.logger.info(f"[Server] Screen has been stopped")
-                if self.testing_enabled:
-                    self.test_continuation_signal.set()
-            elif event=="error":
-                err=message.get("error")
-                err_msg=err.get("message")
-                err_ctx=err.get("context")
-                self.logger.error(f"Received error message from the server: {err_msg} - context: {err_ctx}")
-                if self.testing_enabled:
-                    self.errors_counter+=1
-                    self.test_continuation_signal.set()
-            else:
-                self.logger.error(f"Client received an unknown event: {event}")
+            # Handlers return True when a waiting tester may continue, signalled once here
+            if await self._event_handlers[event](message, event) and self.testing_enabled:
+                self.test_continuation_signal.set()
         except Exception as e:
             self.logger.error(f"Error in message handler: {e}")
 
+    async def _on_handshake(self, message, event):
+        operation = message.get("operation")
+        if operation is None:
+            self.event_logger.error("Operation not provided in a handshake event")
+            return
+        self.event_logger.info("Received handshake for operation: %s", operation)
+        if operation=="mirroring":
+            if not await self._start_mirroring():
+                raise RuntimeError("Failed to inititate mirroring services...")
+        elif operation=="driving":
+            if not await self._start_driving():
+                raise RuntimeError("Failed to inititate driving services...")
+        elif operation=="driving_and_mirroring":
+            if not await self._start_driving_and_mirroring():
+                raise RuntimeError("Failed to inititate driving&mirroring services...")
+
+    async def _on_screen_message_displayed(self, message, event):
+        self.event_logger.info("[Server] Screen message has been added to the render queue")
+        return True
+
+    async def _on_configuration(self, message, event):
+        # Get the configuration target
+        target = message.get("target")
+        context = message.get("context")
+        config = message.get("config")
+        if config is None:
+            self.event_logger.error("Config not found.")
+            return
+        # Servers send config as an object, older ones as a json string inside the message
+        if type(config) is not dict:
+            try:
+                config = json_loads(config)
+            except Exception:
+                self.event_logger.error("Config is not in json format.")
+                return
+        if config is not None:
+            # config is a nested dict, its repr is only built when DEBUG is on
+            if self.event_logger.isEnabledFor(logging.DEBUG):
+                self.event_logger.debug("[Server] Config for %s: %s ", target, config)
+            if self.message_callback:
+                self.message_callback({"event": "configuration", "target": target, "context": context, "config": config})
+            if self.testing_enabled:
+                self.recent_config=config
+            return True
+        else:
+            self.event_logger.error("get_config received undefined config: %s", message)
+            if self.testing_enabled:
+                self.errors_counter+=1
+
+    async def _on_status(self, message, event):
+        status=message.get("status")
+        if status is None:
+            self.event_logger.error("Status not provided in the message")
+            return
+        self.event_logger.info("Received status: %s", status)
+        return True
+
+    async def _on_state(self, message, event):
+        """started_*/stopped_* events, a stopped operation is torn down locally before the state is published"""
+        self.event_logger.info("[Server] %s", STATE_EVENT_LOGS[event])
+        stop_operation = self._operation_stoppers.get(event)
+        if stop_operation is not None:
+            await stop_operation()
+        self._set_state(EVENT_NAMES[event])
+        return True
+
+    async def _on_error(self, message, event):
+        err=message.get("error")
+        err_msg=err.get("message")
+        err_ctx=err.get("context")
+        self.event_logger.error("Received error message from the server: %s - context: %s", err_msg, err_ctx)
+        if self.message_callback:
+            self.message_callback({"event": "error", "message": err_msg})
+        if self.testing_enabled:
+            self.errors_counter+=1
+        return True
+
     def __on_udp_srv_closed(self):
         if not self.client_running: return
         self.logger.warning("udp server crashed unexpectedly")
@@ -1002,24 +1087,19 @@ class TCPClient:
 
     def __reset_operation_values(self):
         with self.data_lock:
-            current_operation=self.get_current_operation()
-            if current_operation == "none":
+            self.transition=Transition.NONE
+            current_operation=self.current_operation
+            if current_operation == OP_NONE:
                 self.logger.error("Can't reset operation values. Current operation is none?")
                 return False
-            self.logger.info(f"Cleaning up operation {current_operation}s values")
-            self.current_operation=ExcavatorAPIProperties.OPERATIONS["none"]
+            self.logger.info(f"Cleaning up operation {ExcavatorAPIProperties.OPERATIONS_REVERSE[current_operation]}s values")
+            self.current_operation=OP_NONE
             self.stop_event.clear()
-        if current_operation == "mirroring":
-            self.mirroring = False
-            self.mirroring_stopping = False
+        if current_operation == OP_MIRRORING:
             self.logger.info("mirroring operation has ended")
-        elif current_operation == "driving":
-            self.driving=False
-            self.driving_stopping=False
+        elif current_operation == OP_DRIVING:
             self.logger.info("Driving operation has ended")
-        elif current_operation =="driving_and_mirroring":
-            self.driving_and_mirroring=False
-            self.driving_and_mirroring_stopping=False
+        elif current_operation == OP_DRIVING_AND_MIRRORING:
             self.logger.info("Driving&mirroring operation has ended")
         else:
             self.logger.error(f"Unknown operation: {current_operation} ongoing...?")
@@ -1029,8 +1109,17 @@ class TCPClient:
         self.client_running = False
         self.client_run_thread=None
 
+    def __claim_transition(self, field, transition, busy_msg):
+        """Moves field (transition or udp_transition) from NONE to transition, the caller holds data_lock.
+        The claimer owns the transition until it stores NONE again"""
+        if getattr(self, field) != Transition.NONE:
+            self.logger.warning(busy_msg)
+            return False
+        setattr(self, field, transition)
+        return True
+
     def __check_operation(self):
-        if self.current_operation != 0:
+        if self.current_operation != OP_NONE:
             err_msg=f"Operation: {ExcavatorAPIProperties.OPERATIONS_REVERSE[self.current_operation]} already underway stop them first to start a different one."
             self.logger.warning(err_msg)
             return False
@@ -1043,28 +1132,37 @@ class TCPClient:
         self.final_cleanup_done.set()
 
     def stop_current_operation(self):
-        self._cleanup_operation()
+        self._cleanup_operation(wait=True)
+
+    def _stop_event_log(self):
+        if self.event_log_running:
+            # Flushes the queued records before returning
+            self.event_log_listener.stop()
+            self.event_log_running=False
 
     def shutdown(self):
-        if not self.client_running: return
+        if not self.client_running:
+            # The connection may have dropped on its own, the event log listener still has to be stopped
+            self._stop_event_log()
+            return
         try:
             self.logger.info("Starting to shutdown TCPClient")
             self.shutdown_event.set()
             self.stop_event.set()
             asyncio.run_coroutine_threadsafe(self.__final_cleanup(), self.loop)
 
-            # Signal for shutdown finished - set from close connections
-            for _ in range(30):
-                if self.final_cleanup_done.is_set():
-                    # Clean up successfull
-                    self.final_cleanup_done.clear()
-                    return True
-                sleep(1)
+            # Signal for shutdown finished - set from close connections, wakes up as soon as it's set
+            if self.final_cleanup_done.wait(timeout=30):
+                # Clean up successfull
+                self.final_cleanup_done.clear()
+                return True
             self.logger.error("Final Clean up timed out.")
             return False
         except Exception as e:
             self.logger.error(f"Failed to shutdown TCPServer: {e}")
             return False
+        finally:
+            self._stop_event_log()
 
 if __name__ == "__main__":
     client = TCPClient(srv_ip="192.168.1.120")
@@ -1074,4 +1172,6 @@ if __name__ == "__main__":
         # client.get_mirroring_status()
         # sleep(5)
         client.stop_mirroring()
-        sleep(3600)
+        # Blocks on the event instead of a fixed sleep, returns as soon as the server drops the connection
+        client.dead_event.wait(timeout=3600)
+        client.shutdown()
@@ -2,10 +2,28 @@ import asyncio
 import websockets
 import threading
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # Linux/macOS only, the server falls back to the stdlib loop elsewhere
+    import uvloop
+except ImportError:
+    uvloop = None
 from dataclass_types import RenderViewInfo, ExcavatorAPIProperties
 from PCA9685_controller import PWMController
 from utils import setup_logging
 
+# orjson when it is installed, responses are decoded to text frames since the clients parse strings
+if orjson is not None:
+    def json_dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+    json_loads = orjson.loads
+else:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
 class TCPServer:
     def __init__(self, actions, cleanup_callback=None, ip="localhost", port=5432):
         self.ip = ip
@@ -39,9 +57,14 @@ class TCPServer:
         self.messages_loop_thread.start()
         return True
 
+    @staticmethod
+    def _new_event_loop():
+        # Only the server's own loops are uvloop, the process wide policy is left alone
+        return uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+
     def _run_messages_loop(self):
         try:
-            self.messages_loop=asyncio.new_event_loop()
+            self.messages_loop=TCPServer._new_event_loop()
             self.messages_loop.run_until_complete(self._message_loop())
         except Exception as e:
             self.logger.error("Messages loop has crashed")
@@ -55,7 +78,7 @@ class TCPServer:
     def _run_async_server(self):
         """Run the asyncio event loop in a separate thread"""
         try:
-            self.loop = asyncio.new_event_loop()
+            self.loop = TCPServer._new_event_loop()
             asyncio.set_event_loop(self.loop)
             self.loop.run_until_complete(self._start_server())
         except Exception as e:
@@ -90,7 +113,8 @@ class TCPServer:
         try:
             while not self.stop_event.is_set():
                 try:
-                    message=await asyncio.wait_for(websocket.recv(), timeout=1)
+                    # Raw frame bytes, the json parser reads UTF-8 itself so the str decode is skipped
+                    message=await asyncio.wait_for(websocket.recv(decode=False), timeout=1)
                     await self._handle_message(websocket, message)
                 except asyncio.TimeoutError:
                     continue
@@ -139,8 +163,9 @@ class TCPServer:
         try:
             # Parse JSON command
             try:
-                command = json.loads(message)
+                command = json_loads(message)
             except json.JSONDecodeError:
+                # orjson.JSONDecodeError is a subclass of this one
                 await self._send_error(websocket,error_msg={"message":  "Command must be valid JSON", "context":  "unknown" })
                 return
             
@@ -239,7 +264,7 @@ class TCPServer:
 
     async def _send_error(self, websocket, error_msg):
         """Send error response to client"""
-        response = json.dumps({"event": "error", "error": error_msg})
+        response = json_dumps({"event": "error", "error": error_msg})
         await websocket.send(response)
 
     def send_error(self, websocket, error_msg):
@@ -251,7 +276,7 @@ class TCPServer:
 
     async def _send_response(self, websocket, data):
         """Send response to client"""
-        response = json.dumps(data)
+        response = json_dumps(data)
         await websocket.send(response)
         
     def send_response(self, websocket, data):
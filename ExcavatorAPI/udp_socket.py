@@ -2,6 +2,7 @@
 # Credit: https://github.com/AI-MaSi
 # ============================================================================
 
+import os
 import socket
 import struct
 import threading
@@ -80,6 +81,8 @@ class UDPSocket:
         self.packets_expired = 0
         self.packets_shape_invalid = 0
         self.packets_corrupted = 0
+        # Valid packets skipped because a newer one was already queued behind them
+        self.packets_superseded = 0
         self.last_packet_time = 0.0
         
         
@@ -94,11 +97,15 @@ class UDPSocket:
         # Pre-computed format strings (filled after handshake)
         self.send_format = None
         self.recv_format = None
+        # Client sockets are connected to the peer after the handshake
+        self.is_server = False
+        self.connected = False
 
     def setup(self, host, port, num_inputs, num_outputs, is_server=False):
         """Set up UDP socket with heartbeat protocol."""
         self.num_inputs = num_inputs
         self.num_outputs = num_outputs
+        self.is_server = is_server
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.settimeout(1.0)
@@ -118,7 +125,7 @@ class UDPSocket:
         return True
     
     @staticmethod
-    def _validate_crc(data: bytes, checksum) -> bool:
+    def _validate_crc(data, checksum) -> bool:
         return UDPSocket.crc16(data) == checksum
     
     def handshake(self, client_tcp_socket=None, timeout=5.0):
@@ -181,26 +188,41 @@ class UDPSocket:
         self.logger.info(f"Send format: {self.send_format}")
         self.logger.info(f"Receive format: {self.recv_format}")
         self.socket.settimeout(1.0)
+        if not self.is_server and not self.connected:
+            # Client talks to exactly one peer. Connecting fixes the route once so every
+            # send skips the per call address lookup, and datagrams from other hosts are dropped by the kernel
+            self.socket.connect(self.remote_addr)
+            self.connected = True
         return True
 
-    def send(self, values):
-        """Send values with timestamp."""
-        if not self.remote_addr:
-            self.logger.warning("No remote address set!")
-            return False
-
+    def pack(self, values) -> Optional[bytes]:
+        """Packs values into a ready to send packet (data + crc), None if the shape is wrong.
+        A sender whose values don't change can pack once and resend the same packet"""
         if len(values) != self.num_outputs:
             self.logger.error(f"Expected {self.num_outputs} values, got {len(values)}")
-            return False
-        
+            return None
         data_wo_crc = struct.pack(self.send_format, *values)
+        return data_wo_crc+struct.pack("<H", UDPSocket.crc16(data_wo_crc))
 
-        # Combine -> data + crc and send
-        data = data_wo_crc+struct.pack("<H", UDPSocket.crc16(data_wo_crc))
-        self.socket.sendto(data, self.remote_addr)
+    def send_packet(self, packet):
+        """Send a packet built by pack() as is."""
+        if not self.remote_addr:
+            self.logger.warning("No remote address set!")
+            return False
+        if self.connected:
+            self.socket.send(packet)
+        else:
+            self.socket.sendto(packet, self.remote_addr)
         self.packets_sent+=1
         return True
 
+    def send(self, values):
+        """Send values with timestamp."""
+        packet = self.pack(values)
+        if packet is None:
+            return False
+        return self.send_packet(packet)
+
     def get_latest(self) -> Optional[List[int]]:
         """
         Get latest data only if it's fresh enough.
@@ -235,6 +257,7 @@ class UDPSocket:
                 'packets_sent': self.packets_sent,
                 'packets_expired': self.packets_expired,
                 'packets_corrupted': self.packets_corrupted,
+                'packets_superseded': self.packets_superseded,
                 'packets_shape_invalid':self.packets_shape_invalid,
                 'data_age_seconds': age,
                 'time_since_last_packet': time_since_last,
@@ -313,31 +336,60 @@ class UDPSocket:
     def _receive_loop(self):
         """Background thread to continuously receive data with timestamps."""
         expected_size = struct.calcsize(self.receive_type)*self.num_inputs + 2
-
-        while not self.stop_event.is_set():
+        payload_size = expected_size - 2
+        # Two buffers for the lifetime of the loop, packets are unpacked into new values before the next read.
+        # One spare byte so an oversized packet is still detected instead of silently truncated
+        rx_bufs = (bytearray(expected_size + 1), bytearray(expected_size + 1))
+        payload_mvs = tuple(memoryview(buf)[:payload_size] for buf in rx_bufs)
+        current = 0
+        # Bound once, the loop body then only does local loads
+        recvfrom_into = self.socket.recvfrom_into
+        fd = self.socket.fileno()
+        stopped = self.stop_event.is_set
+        unpack_crc = struct.Struct("<H").unpack_from
+        unpack_values = struct.Struct(self.recv_format).unpack_from
+
+        while not stopped():
             try:
-                data, addr = self.socket.recvfrom(expected_size)
-                # Force a copy RIGHT HERE
-                data = bytes(data)  # Detach from actuall socket buffer
+                nbytes, addr = recvfrom_into(rx_bufs[current])
                 if not self.remote_addr:
                     self.remote_addr = addr
                 
-                if data == b'':
+                if nbytes == 0:
                     self.logger.info(f"Client: {self.remote_addr} has disconnected.")
                     break
                 
-                if len(data) == expected_size:
+                if nbytes == expected_size:
+                    # Drain what queued up behind this packet, only the newest one is decoded.
+                    # The fd is non-blocking under settimeout, so readv returns at once when the queue is empty
+                    disconnected = False
+                    while True:
+                        try:
+                            queued = os.readv(fd, (rx_bufs[current ^ 1],))
+                        except BlockingIOError:
+                            break
+                        if queued == expected_size:
+                            current ^= 1
+                            self.packets_superseded += 1
+                        elif queued == 0:
+                            disconnected = True
+                            break
+                        else:
+                            self.packets_shape_invalid += 1
+
                     arrival_time = time.time()
+                    rx_buf = rx_bufs[current]
                     # Unpack crc and validate it
+                    received_crc = unpack_crc(rx_buf, payload_size)[0]
                     
-                    values_data = data[:-2]
-                    received_crc = struct.unpack("<H", data[-2:])[0]
-                    
-                    if not UDPSocket._validate_crc(values_data, received_crc):
+                    if not UDPSocket._validate_crc(payload_mvs[current], received_crc):
                         self.packets_corrupted += 1
+                        if disconnected:
+                            self.logger.info(f"Client: {self.remote_addr} has disconnected.")
+                            break
                         continue # just silenty drop the corrupted packet
 
-                    values = list(struct.unpack(self.recv_format, values_data))
+                    values = list(unpack_values(rx_buf))
                         
                     if self._delay_tracking and self.last_packet_time:
                         interval = max(0.0, arrival_time - self.last_packet_time)
@@ -349,12 +401,15 @@ class UDPSocket:
                         self._delay_max = max(self._delay_max, interval)
                         
                     with self.data_lock:
-                        self.latest_data = values.copy()
+                        self.latest_data = values
                         self.latest_timestamp = arrival_time
                         self.packets_received += 1
                         self.last_packet_time = arrival_time
+                    if disconnected:
+                        self.logger.info(f"Client: {self.remote_addr} has disconnected.")
+                        break
                 else:
-                    self.logger.warning(f"Wrong packet size: expected {expected_size}, got {len(data)}")
+                    self.logger.warning(f"Wrong packet size: expected {expected_size}, got {nbytes}")
                     self.packets_shape_invalid += 1
                 
             except socket.timeout:
@@ -373,6 +428,7 @@ class UDPSocket:
         self.logger.info(f"Packets expired: {self.packets_expired}")
         self.logger.info(f"Packets shape invalid: {self.packets_shape_invalid}")
         self.logger.info(f"Packets corrupted: {self.packets_corrupted}")
+        self.logger.info(f"Packets superseded: {self.packets_superseded}")
         self.logger.info(f"Last packet timestamp: {self.last_packet_time}")
     
     def print_delay_stats(self):
@@ -4,7 +4,11 @@ import logging
 from pathlib import Path
 import math
 import sys
-from logging.handlers import RotatingFileHandler
+import ctypes
+import ctypes.util
+from time import monotonic_ns, sleep
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from queue import SimpleQueue
 
 def get_entry_point() -> str:
     return Path(sys.argv[0]).resolve().parent
@@ -49,6 +53,24 @@ def setup_logging(filename="ExcavatorAPI.log", logging_level="INFO", log_to_file
         logger.addHandler(console_handler)
         return logger
     
+class _UnformattedQueueHandler(QueueHandler):
+    """QueueHandler.prepare formats the record on the calling thread, this queues it as is"""
+    def prepare(self, record):
+        return record
+
+def setup_queued_logger(parent, name):
+    """Child logger of parent whose records are queued to a listener thread that runs the parent's handlers,
+    so record formatting and file/console writes happen off the logging thread. Arguments are formatted
+    on the listener thread, don't mutate them after logging. Start and stop the returned listener"""
+    queue = SimpleQueue()
+    logger = parent.getChild(name)
+    # Level is still inherited from the parent
+    logger.propagate = False
+    logger.handlers.clear()
+    logger.addHandler(_UnformattedQueueHandler(queue))
+    listener = QueueListener(queue, *parent.handlers, respect_handler_level=True)
+    return logger, listener
+
 def get_cpu_temperature():
     try:
         with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
@@ -65,4 +87,30 @@ def get_cpu_core_usage(interval=1):
 def serialize_with_inf_handling(obj):
     if isinstance(obj, float) and math.isinf(obj):
         return None  # or "Infinity" or a large number like 999999
-    return obj
\ No newline at end of file
+    return obj
+
+# Absolute deadline sleeping on CLOCK_MONOTONIC (same clock as time.monotonic_ns on linux)
+CLOCK_MONOTONIC = 1
+TIMER_ABSTIME = 1
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+try:
+    _clock_nanosleep = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).clock_nanosleep
+    _clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(_Timespec), ctypes.POINTER(_Timespec)]
+except (OSError, AttributeError, TypeError):
+    _clock_nanosleep = None
+
+def sleep_until_ns(deadline_ns):
+    """Sleeps until the monotonic_ns() deadline. Uses clock_nanosleep with TIMER_ABSTIME
+    so wakeups don't drift, falls back to time.sleep where it isn't available"""
+    if _clock_nanosleep is None:
+        remaining = deadline_ns - monotonic_ns()
+        if remaining > 0:
+            sleep(remaining / 1e9)
+        return
+    ts = _Timespec(deadline_ns // 1_000_000_000, deadline_ns % 1_000_000_000)
+    # Returns EINTR (4) when interrupted by a signal, the deadline is absolute so just retry
+    while _clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, ctypes.byref(ts), None) == 4:
+        pass
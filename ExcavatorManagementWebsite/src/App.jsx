@@ -132,7 +132,8 @@ export default function App() {
       } else if (message.event === 'configuration') {
           // Cache the config based on type
           let ctx=message.context
-          let cfg=JSON.parse(message.config)
+          // Newer servers send the config as an object, older ones as a json string
+          let cfg=typeof message.config === "string" ? JSON.parse(message.config) : message.config
           var target=message?.target
 
           if (ctx.includes("configure_")) {
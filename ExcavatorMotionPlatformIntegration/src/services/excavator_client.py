@@ -827,11 +827,13 @@ class TCPClient:
                 if config is None:
                     self.logger.error("Config not found.")
                     return
-                try:
-                    config = json.loads(config)
-                except Exception:
-                    self.logger.error("Config is not in json format.")
-                    return
+                # Servers send config as an object, older ones as a json string inside the message
+                if not isinstance(config, dict):
+                    try:
+                        config = json.loads(config)
+                    except Exception:
+                        self.logger.error("Config is not in json format.")
+                        return
                 if config is not None:
                     self.logger.debug(f"[Server] Config for {target}: {config} ")
                     if self.testing_enabled: